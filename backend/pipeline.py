@@ -0,0 +1,270 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import requests
+from bs4 import BeautifulSoup
+
+from backend.privacy_score import ScoreWeights, score_trackers
+from utils.content_scanner import ContentScanner
+from utils.metrics import Counters
+from utils.page_analysis import browser_reason, find_trackers
+from utils.profiling import Profiler
+from utils.tracker_db import TrackerDatabase
+from utils.tracker_index import MappedTrackerDatabase, TrackerIndexError
+
+# Per-process state of parse workers, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(tracker_file, index_file, config, events=None):
+    poll_interval = config["trackers.poll_interval"]
+    trackers = None
+    if index_file:
+        # Map the index the server built instead of compiling a private copy
+        try:
+            trackers = MappedTrackerDatabase(index_file, tracker_file, poll_interval)
+        except (OSError, TrackerIndexError) as e:
+            print(f"Tracker index unavailable, compiling {tracker_file} instead: {e}")
+    if trackers is None:
+        trackers = TrackerDatabase(tracker_file, poll_interval)
+    trackers.start_watching()
+    _worker["trackers"] = trackers
+    _worker["scanner"] = ContentScanner.from_config(config)
+    _worker["min_body_text"] = config["scan.min_body_text"]
+    _worker["weights"] = ScoreWeights.with_overrides(config["score.category_weights"], config["score.company_weights"])
+    # Tracker hits of streamed scans go back to the server through this queue
+    _worker["events"] = events
+    # Samples parses when profiling is on; the stacks go back with the result and the
+    # server saves them with the profile of the request, so nothing is saved here
+    _worker["profiler"] = Profiler(None, float("inf"), config["profiling.interval_ms"] / 1000,
+                                   enabled=config["profiling.enabled"])
+
+
+def parse_page(url, raw, encoding=None, src_tags=("script",), stream_id=None, provisional=False):
+    """Parses and matches one page inside a parse worker, returning a compact result.
+
+    With a stream_id, tracker hits are also sent to the server as they are
+    found, unless the page is provisional and has a render hint: a browser
+    scan will replace its result. When profiling is on, the sampled stacks
+    are returned as worker_stacks.
+    """
+    started = time.perf_counter()
+    matcher = _worker["trackers"].current()
+    with _worker["profiler"].session("parse_page") as profile:
+        if isinstance(raw, bytes):
+            soup = BeautifulSoup(raw, "html.parser", from_encoding=encoding)
+        else:
+            soup = BeautifulSoup(raw, "html.parser")
+        render_hint = browser_reason(soup, _worker["min_body_text"])
+        report = None
+        if stream_id is not None and not (provisional and render_hint):
+            report = lambda hits: _worker["events"].put((stream_id, hits))
+        trackers = find_trackers(soup, matcher, _worker["scanner"], src_tags, report)
+        score = score_trackers(trackers, _worker["weights"])
+    return {
+        "url": url,
+        "trackers": trackers,
+        "privacy_score": score,
+        "tracker_db_version": matcher.version,
+        "render_hint": render_hint,
+        "parse_seconds": time.perf_counter() - started,
+        "worker_stacks": dict(getattr(profile, "stacks", {})),
+    }
+
+
+def fetch_page(url, timeout):
+    """Downloads a page without rendering it, returning (raw bytes, declared encoding)."""
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content, response.encoding
+
+
+class StageStats:
+    """Busy time of a pool of workers, reported as utilization since start."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._busy = 0.0
+        self._items = 0
+
+    def record(self, seconds, items=1):
+        with self._lock:
+            self._busy += seconds
+            self._items += items
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            return {
+                "workers": self.workers,
+                "items": self._items,
+                "busy_seconds": round(self._busy, 3),
+                "utilization": round(self._busy / (self.workers * elapsed), 4),
+            }
+
+
+class ScanPipeline:
+    """Fetch threads feeding a process pool of parse/match workers.
+
+    Fetched pages wait in a bounded queue; when parse workers fall behind the
+    queue fills up and fetch threads block on it, so memory stays bounded
+    and the fetch stage slows to the pace of the parse stage.
+    """
+
+    def __init__(self, config, tracker_file, index_file=None, fetch=None):
+        self.fetch_workers = config["pipeline.fetch_workers"]
+        self.parse_workers = config["pipeline.parse_workers"] or os.cpu_count() or 1
+        self.timeout = config["scan.timeout"]
+        # fetch(url, download) may wrap download with rate limiting and retries;
+        # only the time spent in download counts as fetch stage work
+        self.fetch = fetch or (lambda url, download: download(url))
+
+        self._fetch_pool = ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="scan-fetch")
+        # Workers put (stream id, tracker hits) here; the relay thread hands them to the stream's listener
+        self._events = multiprocessing.Queue()
+        self._listeners = {}
+        self._stream_ids = itertools.count(1)
+        self._worker_args = (tracker_file, index_file, config, self._events)
+        self._pool_lock = threading.Lock()
+        self._parse_pool = self._new_parse_pool()
+        self._queue = queue.Queue(config["pipeline.queue_size"])
+        # Keeps the process pool's own unbounded work queue short
+        self._parse_slots = threading.BoundedSemaphore(self.parse_workers * 2)
+
+        self.fetch_stats = StageStats(self.fetch_workers)
+        self.parse_stats = StageStats(self.parse_workers)
+        self.counters = Counters("fetched", "fetch_failed", "parsed", "parse_failed", "backpressure_waits",
+                                 "parse_pool_restarts")
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="scan-dispatch", daemon=True)
+        self._dispatcher.start()
+        self._relay = threading.Thread(target=self._relay_events, name="scan-events", daemon=True)
+        self._relay.start()
+
+    def parse(self, url, raw, encoding=None, on_trackers=None, provisional=False):
+        """Submits an already fetched page to the parse stage and returns a Future.
+
+        on_trackers, if given, is called from another thread with each batch
+        of tracker hits as the worker finds them; batches still in transit
+        when the Future completes are dropped. See parse_page for provisional.
+        """
+        result = Future()
+        options = {}
+        if on_trackers is not None:
+            stream_id = next(self._stream_ids)
+            self._listeners[stream_id] = on_trackers
+            result.add_done_callback(lambda _: self._listeners.pop(stream_id, None))
+            options = {"stream_id": stream_id, "provisional": provisional}
+        self._queue.put((url, raw, encoding, result, options))
+        return result
+
+    def submit(self, url):
+        """Queues url for fetching and parsing and returns a Future of its result."""
+        result = Future()
+        self._fetch_pool.submit(self._fetch, url, result)
+        return result
+
+    def scan_many(self, urls):
+        """Yields (url, result or exception) pairs as scans complete."""
+        futures = {self.submit(url): url for url in urls}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], error if error is not None else future.result()
+
+    def stats(self):
+        return {
+            "fetch": self.fetch_stats.snapshot(),
+            "parse": self.parse_stats.snapshot(),
+            "queue": {"size": self._queue.qsize(), "capacity": self._queue.maxsize},
+            **self.counters.snapshot(),
+        }
+
+    def close(self):
+        self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+        self._parse_pool.shutdown(wait=False, cancel_futures=True)
+        self._events.put(None)
+
+    def _new_parse_pool(self):
+        return ProcessPoolExecutor(self.parse_workers, initializer=_init_worker, initargs=self._worker_args)
+
+    def _replace_broken_pool(self, broken):
+        """Starts a new parse pool unless broken has already been replaced, and returns the current pool."""
+        with self._pool_lock:
+            if self._parse_pool is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._parse_pool = self._new_parse_pool()
+                self.counters.incr("parse_pool_restarts")
+                print("A parse worker died; started a new parse pool")
+            return self._parse_pool
+
+    def _download(self, url):
+        started = time.perf_counter()
+        try:
+            return fetch_page(url, self.timeout)
+        finally:
+            self.fetch_stats.record(time.perf_counter() - started, items=0)
+
+    def _fetch(self, url, result):
+        try:
+            raw, encoding = self.fetch(url, self._download)
+        except Exception as e:
+            self.counters.incr("fetch_failed")
+            result.set_exception(e)
+            return
+        finally:
+            self.fetch_stats.record(0.0)
+        self.counters.incr("fetched")
+        if self._queue.full():
+            self.counters.incr("backpressure_waits")
+        self._queue.put((url, raw, encoding, result, {}))
+
+    def _dispatch(self):
+        while True:
+            url, raw, encoding, result, options = self._queue.get()
+            self._parse_slots.acquire()
+            pool = self._parse_pool
+            try:
+                try:
+                    future = pool.submit(parse_page, url, raw, encoding, **options)
+                except BrokenProcessPool:
+                    # A worker died since the last parse finished
+                    pool = self._replace_broken_pool(pool)
+                    future = pool.submit(parse_page, url, raw, encoding, **options)
+            except Exception as e:
+                self._parse_slots.release()
+                result.set_exception(e)
+                continue
+            future.add_done_callback(lambda done, result=result, pool=pool: self._parsed(done, result, pool))
+
+    def _parsed(self, done, result, pool):
+        self._parse_slots.release()
+        error = done.exception()
+        if error is not None:
+            self.counters.incr("parse_failed")
+            if isinstance(error, BrokenProcessPool):
+                # Pages that were in flight fail; later ones go to a new pool
+                self._replace_broken_pool(pool)
+            result.set_exception(error)
+            return
+        page = done.result()
+        self.parse_stats.record(page.pop("parse_seconds"))
+        self.counters.incr("parsed")
+        result.set_result(page)
+
+    def _relay_events(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            stream_id, hits = event
+            listener = self._listeners.get(stream_id)
+            if listener is not None:
+                listener(hits)
@@ -1 +1,139 @@
- 
+import json
+
+import numpy as np
+
+# Points deducted for each distinct tracker, by category
+CATEGORY_WEIGHTS = {
+    "Advertising": 10,
+    "Social Media": 8,
+    "User Behavior Analytics": 8,
+    "Analytics": 6,
+    "Tag Management": 4,
+    "A/B Testing": 4,
+    "Customer Support": 3,
+    "Video": 3,
+    "Audio": 3,
+    "Performance": 2,
+    "Performance Monitoring": 2,
+}
+DEFAULT_CATEGORY_WEIGHT = 5
+
+# Multipliers for companies whose trackers follow users across many sites
+COMPANY_WEIGHTS = {
+    "Google": 1.5,
+    "Meta": 1.5,
+    "Amazon": 1.25,
+    "Microsoft": 1.25,
+    "TikTok": 1.25,
+    "Twitter": 1.25,
+    "LinkedIn": 1.25,
+}
+DEFAULT_COMPANY_WEIGHT = 1.0
+
+
+class ScoreWeights:
+    """Category and company weights used to turn tracker hits into a score."""
+
+    def __init__(self, categories=None, companies=None,
+                 default_category=DEFAULT_CATEGORY_WEIGHT, default_company=DEFAULT_COMPANY_WEIGHT):
+        self.categories = dict(CATEGORY_WEIGHTS if categories is None else categories)
+        self.companies = dict(COMPANY_WEIGHTS if companies is None else companies)
+        self.default_category = default_category
+        self.default_company = default_company
+
+    @classmethod
+    def with_overrides(cls, categories=None, companies=None):
+        """Default weights with some categories or companies reweighted."""
+        return cls({**CATEGORY_WEIGHTS, **(categories or {})}, {**COMPANY_WEIGHTS, **(companies or {})})
+
+    def key(self):
+        """A string that changes whenever any weight does."""
+        return json.dumps([self.categories, self.companies, self.default_category, self.default_company],
+                          sort_keys=True)
+
+    def penalty(self, category, company):
+        return (self.categories.get(category, self.default_category)
+                * self.companies.get(company, self.default_company))
+
+    def category_vector(self, categories):
+        return np.array([self.categories.get(c, self.default_category) for c in categories], dtype=np.float64)
+
+    def company_vector(self, companies):
+        return np.array([self.companies.get(c, self.default_company) for c in companies], dtype=np.float64)
+
+
+DEFAULT_WEIGHTS = ScoreWeights()
+
+
+def _to_score(penalty):
+    return int(round(min(100.0, max(0.0, 100.0 - penalty))))
+
+
+def score_trackers(trackers, weights=DEFAULT_WEIGHTS):
+    """Scores a single scan; repeated hits of the same tracker only count once."""
+    seen = set()
+    penalty = 0.0
+    for tracker in trackers:
+        if tracker["name"] in seen:
+            continue
+        seen.add(tracker["name"])
+        penalty += weights.penalty(tracker["category"], tracker["company"])
+    return _to_score(penalty)
+
+
+class ScanBatch:
+    """Deduplicated tracker hits of many scans, encoded as category/company ID arrays.
+
+    Encoding is the only per-hit Python work, so a batch can be rescored
+    against new weights with a handful of array operations.
+    """
+
+    def __init__(self, scan_ids, category_ids, company_ids, categories, companies, size):
+        self.scan_ids = scan_ids
+        self.category_ids = category_ids
+        self.company_ids = company_ids
+        self.categories = categories
+        self.companies = companies
+        self.size = size
+
+    def penalties(self, weights=DEFAULT_WEIGHTS):
+        hit_penalties = (weights.category_vector(self.categories)[self.category_ids]
+                         * weights.company_vector(self.companies)[self.company_ids])
+        return np.bincount(self.scan_ids, weights=hit_penalties, minlength=self.size)
+
+    def score(self, weights=DEFAULT_WEIGHTS):
+        return np.rint(np.clip(100.0 - self.penalties(weights), 0.0, 100.0)).astype(np.int64)
+
+
+def encode_scans(scans):
+    """Builds a ScanBatch from an iterable of tracker lists, one per scan."""
+    category_index = {}
+    company_index = {}
+    scan_ids = []
+    category_ids = []
+    company_ids = []
+    size = 0
+    for scan_id, trackers in enumerate(scans):
+        size = scan_id + 1
+        seen = set()
+        for tracker in trackers:
+            if tracker["name"] in seen:
+                continue
+            seen.add(tracker["name"])
+            scan_ids.append(scan_id)
+            category_ids.append(category_index.setdefault(tracker["category"], len(category_index)))
+            company_ids.append(company_index.setdefault(tracker["company"], len(company_index)))
+
+    return ScanBatch(
+        np.array(scan_ids, dtype=np.int64),
+        np.array(category_ids, dtype=np.int64),
+        np.array(company_ids, dtype=np.int64),
+        list(category_index),
+        list(company_index),
+        size,
+    )
+
+
+def score_batch(scans, weights=DEFAULT_WEIGHTS):
+    """Scores many scans at once, returning an integer array aligned with scans."""
+    return encode_scans(scans).score(weights)
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+from utils.metrics import Counters
+
+
+class RateLimited(Exception):
+    """Raised when a domain has no scan budget left within the allowed wait."""
+
+    def __init__(self, domain, retry_after):
+        super().__init__(f"Rate limit exceeded for {domain}")
+        self.domain = domain
+        self.retry_after = retry_after
+
+
+def normalize_url(url):
+    """Returns a canonical form of url so equivalent requests share one key."""
+    url = url.strip()
+    if not url.startswith("http"):
+        url = "https://" + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if not host:
+        raise ValueError(f"No host in URL: {url}")
+    port = parts.port
+    netloc = host
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        netloc = f"{host}:{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def domain_of(url):
+    host = (urlsplit(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.counters = Counters("executed", "coalesced", "failed")
+
+    def do(self, key, fn):
+        """Returns (result, shared) where shared is True if another caller ran fn."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            self.counters.incr("coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        self.counters.incr("executed")
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            self.counters.incr("failed")
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        stats = self.counters.snapshot()
+        with self._lock:
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, max_wait):
+        """Takes a token, returning how long to wait for it, or None if over max_wait."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        wait = (1 - self.tokens) / self.rate
+        if wait > max_wait:
+            return None
+        # Tokens go negative so later callers queue up behind this reservation
+        self.tokens -= 1
+        return wait
+
+
+class DomainRateLimiter:
+    """Keeps one token bucket per target domain, evicting the least recently used."""
+
+    def __init__(self, rate, burst, max_wait, max_domains=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_domains = max_domains
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.counters = Counters("allowed", "delayed", "rejected")
+
+    def acquire(self, domain):
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[domain] = bucket
+                if len(self._buckets) > self.max_domains:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(domain)
+            wait = bucket.reserve(self.max_wait)
+            retry_after = (1 - bucket.tokens) / self.rate
+
+        if wait is None:
+            self.counters.incr("rejected")
+            raise RateLimited(domain, retry_after)
+        if wait > 0:
+            self.counters.incr("delayed")
+            time.sleep(wait)
+        self.counters.incr("allowed")
+
+    def stats(self):
+        stats = self.counters.snapshot()
+        with self._lock:
+            stats["domains"] = len(self._buckets)
+        return stats
+
+
+class ResultCache:
+    """Finished scan results reused for ttl seconds, evicting the least recently used."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.counters = Counters("hits", "misses")
+
+    def get(self, key):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.counters.incr("hits")
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        self.counters.incr("misses")
+        return None
+
+    def put(self, key, value):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        stats = self.counters.snapshot()
+        with self._lock:
+            stats["size"] = len(self._entries)
+        return stats
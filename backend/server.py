@@ -1,97 +1,493 @@
-TRACKER_DATABASE = {
-    "google-analytics": {"name": "Google Analytics", "category": "Analytics", "company": "Google"},
-    "googletagmanager": {"name": "Google Tag Manager", "category": "Analytics", "company": "Google"},
-    "doubleclick": {"name": "Google Ads", "category": "Advertising", "company": "Google"},
-    "facebook": {"name": "Facebook Pixel", "category": "Advertising", "company": "Meta"},
-    "ads-twitter": {"name": "Twitter Ads", "category": "Advertising", "company": "Twitter"},
-    "tiktok": {"name": "TikTok Pixel", "category": "Advertising", "company": "TikTok"},
-    "linkedin": {"name": "LinkedIn Insights", "category": "Social Media", "company": "LinkedIn"},
-    "quantserve": {"name": "Quantcast", "category": "Advertising", "company": "Quantcast"},
-    "scorecardresearch": {"name": "Scorecard Research", "category": "Analytics", "company": "ComScore"},
-    "newrelic": {"name": "New Relic", "category": "Performance Monitoring", "company": "New Relic"},
-    "mixpanel": {"name": "Mixpanel", "category": "Analytics", "company": "Mixpanel"},
-    "hotjar": {"name": "Hotjar", "category": "User Behavior Analytics", "company": "Hotjar"},
-    "youtube.com/pagead": {"name": "YouTube Ads", "category": "Advertising", "company": "Google"},
-    "youtube.com/api/stats": {"name": "YouTube Analytics", "category": "Analytics", "company": "Google"},
-}
-
-
-
-from flask import Flask, request, jsonify
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from flask import Blueprint, Flask, Response, request, jsonify
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
-import os
 
-app = Flask(__name__)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from backend.pipeline import ScanPipeline, fetch_page
+from backend.privacy_score import ScoreWeights, score_batch
+from backend.tiering import TieredScanner
+from backend.tracker_analysis import BUCKET_SECONDS, TrackerCorpus
+from database.db_manager import ScanDatabase
+from backend.scan_control import (
+    SingleFlight, DomainRateLimiter, ResultCache, RateLimited, normalize_url, domain_of
+)
+from utils.config import RESOURCE_PROFILES, load_config
+from utils.fetching import Fetcher, FetchError, status_error
+from utils.profiling import Profiler
+from utils.tracker_db import TrackerDatabase
+from utils.tracker_index import build_index
+
+# Edit this file to add trackers; the running server picks up changes automatically
+TRACKER_FILE = os.path.join(ROOT_DIR, "database", "tracker_database.json")
+
+# Routes are served by the app create_app() builds. Everything below is set up
+# there rather than at import time, so that parse worker processes, which
+# import this module again when started with spawn, do not open the database,
+# rebuild the index or start a pool of their own.
+routes = Blueprint("scans", __name__)
+
+app = None
+config = None
+TRACKERS = None
+INDEX_FILE = None
+profiler = None
+scan_db = None
+corpus = None
+corpus_lock = threading.Lock()
+scan_flight = SingleFlight()
+result_cache = None
+scan_slots = None
+domain_limiter = None
+fetcher = None
+pipeline = None
+tiered_scanner = None
+
+# HTTP status returned to clients for each kind of fetch failure
+FAILURE_STATUS = {"invalid_url": 400, "dns": 502, "connect": 502, "tls": 502, "http_status": 502, "timeout": 504,
+                  "bad_response": 502, "circuit_open": 503}
+
+
+def create_app():
+    """Loads the configuration, opens the history and starts the scan pipeline; returns the Flask app.
+
+    Later calls return the app already created.
+    """
+    global app, config, TRACKERS, INDEX_FILE, profiler, scan_db, corpus, result_cache, scan_slots
+    global domain_limiter, fetcher, pipeline, tiered_scanner
+    if app is not None:
+        return app
+
+    config = load_config()
+
+    TRACKERS = TrackerDatabase(TRACKER_FILE, poll_interval=config["trackers.poll_interval"])
+    INDEX_FILE = os.path.join(ROOT_DIR, config["trackers.index_file"]) if config["trackers.index_file"] else None
+
+    # Parse workers map this index; it is rewritten whenever the tracker file changes
+    if INDEX_FILE:
+        rebuild_index(TRACKERS.current())
+        TRACKERS.listeners.append(rebuild_index)
+
+    # Samples request threads when enabled; slow scans are saved as collapsed stacks
+    profiler = Profiler.from_config(config, ROOT_DIR)
+
+    # Scan history, also used to report what changed since a page's previous scan. It is
+    # kept apart from the desktop app's history because the two use different tracker files.
+    scan_db = ScanDatabase(os.path.join(ROOT_DIR, config["database.server_path"]))
+    # Stored scores follow the score.* weights in effect
+    score_weights = ScoreWeights.with_overrides(config["score.category_weights"], config["score.company_weights"])
+    scan_db.rescore(score_weights.key(), lambda scans: score_batch(scans, score_weights))
+
+    # Tracker statistics over the whole history, extended as scans are recorded
+    corpus = TrackerCorpus.from_database(scan_db)
+
+    result_cache = ResultCache(config["server.result_cache_size"], config["server.result_cache_ttl"])
+    scan_slots = threading.BoundedSemaphore(config["server.max_concurrent_scans"])
+    # Per-domain scan budget; requests that would queue longer than max_wait get a 429
+    domain_limiter = DomainRateLimiter(
+        config["rate_limit.rate"],
+        config["rate_limit.burst"],
+        config["rate_limit.max_wait"],
+        config["rate_limit.max_domains"],
+    )
+
+    # Retries transient fetch failures and stops contacting hosts that keep failing
+    fetcher = Fetcher.from_config(config)
+
+    # Fetching runs on threads; parsing and matching run in worker processes
+    pipeline = ScanPipeline(config, TRACKER_FILE, INDEX_FILE, fetch=rate_limited_fetch)
+
+    # Scans match static HTML first and only start a browser when the page needs one
+    tiered_scanner = TieredScanner(static_scan, run_scan, config["scan.tiering"])
+
+    app = Flask(__name__)
+    app.register_blueprint(routes)
+    return app
+
+
+def rebuild_index(matcher):
+    try:
+        build_index(matcher, INDEX_FILE)
+    except OSError as e:
+        # Workers keep mapping the previous index until a rebuild succeeds
+        print(f"Could not write tracker index {INDEX_FILE}: {e}")
+
+
+def rate_limited_fetch(url, download):
+    """Runs download(url) through the fetcher, taking a domain token for every attempt."""
+    def attempt():
+        domain_limiter.acquire(domain_of(url))
+        return download(url)
+    return fetcher.run(url, attempt)
+
+
+def failure_response(error):
+    response = jsonify(error.to_dict())
+    if error.retry_after is not None:
+        response.headers["Retry-After"] = str(max(1, round(error.retry_after)))
+    return response, FAILURE_STATUS[error.kind]
 
-@app.route('/')
+
+@routes.route('/')
 def home():
     return "Flask server is running!"
 
 
-@app.route('/scan', methods=['GET'])
+@routes.route('/stats')
+def stats():
+    return jsonify({
+        "tracker_db_version": TRACKERS.version,
+        "scans": scan_flight.stats(),
+        "result_cache": result_cache.stats(),
+        "rate_limiter": domain_limiter.stats(),
+        "fetch": fetcher.stats(),
+        "pipeline": pipeline.stats(),
+        "tiers": tiered_scanner.stats()
+    })
+
+
+@routes.route('/profiles')
+def profiles():
+    """Lists the slowest profiled scans."""
+    try:
+        n = int(request.args.get("n", 10))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"enabled": profiler.enabled, "threshold_ms": profiler.threshold * 1000,
+                    "worst": profiler.worst(max(1, min(n, 1000)))})
+
+
+@routes.route('/scan', methods=['GET'])
 def scan_website():
-    """Scans a website for tracking scripts using Selenium and BeautifulSoup."""
+    """Scans a website for tracking scripts, from static HTML or in a browser when the page needs it."""
+    url = request.args.get("url")
+
+    if not url:
+        return jsonify({"error": "No URL provided"}), 400
+
+    # Concurrent requests for the same page share a single scan
+    try:
+        url = normalize_url(url)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cached = result_cache.get(url)
+    if cached is not None:
+        return jsonify(cached)
+
+    try:
+        # Parsing runs in worker processes; their samples are added under a "parse worker" frame
+        with profiler.session("scan_website") as profile:
+            result, _ = scan_flight.do(url, lambda: tiered_scan(url))
+            profile.key = result.get("scan_id")
+        return jsonify(result)
+
+    except RateLimited as e:
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = str(max(1, round(e.retry_after)))
+        return response, 429
+
+    except FetchError as e:
+        return failure_response(e)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@routes.route('/scan/stream', methods=['GET'])
+def scan_stream():
+    """Streams scan progress as Server-Sent Events, or as NDJSON with format=ndjson.
+
+    Events: fetch_started, page_loaded for each page fetched (a static
+    fetch and then a browser render when the scan escalates), one tracker
+    event per detection as the parse worker matches the page, then score,
+    or error if the scan fails or the domain is over its rate limit.
+    Cached results and scans of the same URL already in progress are
+    shared, in which case page_loaded is skipped and the trackers follow
+    the finished scan. A client that disconnects stops its stream; the
+    scan itself finishes and is cached.
+    """
     url = request.args.get("url")
+    if not url:
+        return jsonify({"error": "No URL provided"}), 400
+    try:
+        url = normalize_url(url)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cached = result_cache.get(url)
+    if request.args.get("format") == "ndjson":
+        body = (json.dumps({"event": name, **data}) + "\n" for name, data in scan_events(url, cached))
+        return Response(body, mimetype="application/x-ndjson")
+    body = (f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in scan_events(url, cached))
+    return Response(body, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def scan_events(url, cached=None):
+    """Yields (event name, data) pairs as a scan of url progresses, or replays cached."""
+    started = time.perf_counter()
+    yield "fetch_started", {"url": url}
+    streamed = 0
+    if cached is not None:
+        result, source = cached, "cache"
+    else:
+        progress = queue.Queue()
+
+        def run():
+            try:
+                progress.put(("done", scan_flight.do(url, lambda: tiered_scan(url, progress))))
+            except Exception as e:
+                progress.put(("failed", e))
+
+        threading.Thread(target=run, name="scan-stream", daemon=True).start()
+        while True:
+            name, data = progress.get()
+            if name == "failed":
+                if isinstance(data, FetchError):
+                    yield "error", data.to_dict()
+                elif isinstance(data, RateLimited):
+                    yield "error", {"error": str(data), "retry_after": max(1, round(data.retry_after))}
+                else:
+                    yield "error", {"error": str(data)}
+                return
+            if name == "done":
+                result, shared = data
+                source = "shared" if shared else "scan"
+                break
+            if name == "trackers":
+                for tracker in data:
+                    yield "tracker", tracker
+                streamed += len(data)
+                continue
+            yield name, data
+
+    # Whatever was not streamed: replays, shared scans and batches still in transit
+    for tracker in result["trackers"][streamed:]:
+        yield "tracker", tracker
+    yield "score", {
+        "url": url,
+        "privacy_score": result["privacy_score"],
+        "tracker_count": len(result["trackers"]),
+        "tracker_db_version": result["tracker_db_version"],
+        "scan_id": result["scan_id"],
+        "changes": result["changes"],
+        "tier": result.get("tier"),
+        "source": source,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+@routes.route('/scan/batch', methods=['POST'])
+def scan_batch():
+    """Scans many websites from their static HTML through the fetch/parse pipeline."""
+    urls = (request.get_json(silent=True) or {}).get("urls")
+    if not isinstance(urls, list) or not urls:
+        return jsonify({"error": "Expected a JSON body with a non-empty \"urls\" list"}), 400
+    if len(urls) > config["pipeline.max_batch_urls"]:
+        return jsonify({"error": f"At most {config['pipeline.max_batch_urls']} URLs per batch"}), 400
 
+    try:
+        urls = list(dict.fromkeys(normalize_url(str(url)) for url in urls))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = []
+    errors = {}
+    for url, outcome in pipeline.scan_many(urls):
+        if isinstance(outcome, FetchError):
+            errors[url] = outcome.to_dict()
+        elif isinstance(outcome, Exception):
+            errors[url] = {"error": str(outcome)}
+        else:
+            outcome.pop("worker_stacks")
+            outcome["timestamp"] = time.time()
+            record_scan(url, outcome)
+            results.append(outcome)
+    return jsonify({"results": results, "errors": errors})
+
+
+@routes.route('/changes', methods=['GET'])
+def scan_changes():
+    """Lists recent scans of a page that added or removed trackers, newest first."""
+    url = request.args.get("url")
     if not url:
         return jsonify({"error": "No URL provided"}), 400
+    try:
+        url = normalize_url(url)
+        limit = int(request.args.get("limit", 20))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"url": url, "changes": scan_db.changes(url, max(1, min(limit, 1000)))})
 
-    # Ensure URL starts with http:// or https://
-    if not url.startswith("http"):
-        url = "https://" + url
 
+@routes.route('/search', methods=['GET'])
+def search_scans():
+    """Searches recorded scans by text and tracker, category or company."""
     try:
-        # Set up Selenium WebDriver (Headless Mode)
-        options = Options()
+        limit = int(request.args.get("limit", 200))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    scans = scan_db.search(
+        request.args.get("q", ""),
+        tracker=request.args.get("tracker"),
+        category=request.args.get("category"),
+        company=request.args.get("company"),
+        limit=max(1, min(limit, 1000)),
+    )
+    return jsonify({"scans": scans})
+
+
+@routes.route('/analytics', methods=['GET'])
+def analytics():
+    """Reports the most widespread trackers and companies and how common each category is over time."""
+    try:
+        n = max(1, min(int(request.args.get("n", 10)), 1000))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    bucket = request.args.get("bucket", "day")
+    if bucket not in BUCKET_SECONDS:
+        return jsonify({"error": f"bucket must be one of {', '.join(BUCKET_SECONDS)}"}), 400
+    tracker = request.args.get("tracker")
+
+    with corpus_lock:
+        report = {
+            "scans": corpus.scan_count,
+            "top_trackers": corpus.top_trackers(n),
+            "top_companies": corpus.top_companies(n),
+        }
+        if tracker:
+            report["co_occurring"] = corpus.co_occurring(tracker, n)
+        starts, categories, prevalence = corpus.category_trend(bucket)
+    report["category_trend"] = {
+        "bucket": bucket,
+        "starts": starts.tolist(),
+        "categories": categories,
+        "prevalence": prevalence.round(4).tolist(),
+    }
+    return jsonify(report)
+
+
+def record_scan(url, result):
+    scan_id, added, removed = scan_db.save_scan(
+        url, result["privacy_score"], result["trackers"], result["timestamp"], result["tracker_db_version"])
+    result["scan_id"] = scan_id
+    result["changes"] = {"added": added, "removed": removed}
+    with corpus_lock:
+        corpus.add_scan(url, result["trackers"], result["timestamp"])
+
+
+def tiered_scan(url, progress=None):
+    """Scans url as the single flight of its URL; progress, if given, receives stream events.
+
+    Every page fetch takes a domain token, so a scan escalated to the browser takes two.
+    """
+    result = tiered_scanner.scan(url, progress)
+    record_scan(url, result)
+    result_cache.put(url, result)
+    return result
+
+
+def make_driver():
+    """Starts a configured headless Chrome; replace driver_factory to scan with another driver."""
+    options = Options()
+    if config["browser.headless"]:
         options.add_argument("--headless")
-        service = Service(os.path.join(os.getcwd(), "backend", "chromedriver.exe"))
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # Load the Website
+    # The performance log carries the main document's HTTP status, which driver.get does not report
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    profile = RESOURCE_PROFILES[config["browser.resource_profile"]]
+    if profile["prefs"]:
+        options.add_experimental_option("prefs", profile["prefs"])
+    service = Service(os.path.join(os.getcwd(), config["browser.chromedriver_path"]))
+    driver = webdriver.Chrome(service=service, options=options)
+    driver.set_page_load_timeout(config["browser.page_load_timeout"])
+    if profile["blocked_urls"]:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["blocked_urls"]})
+    return driver
+
+
+driver_factory = make_driver
+
+
+def document_status(driver):
+    """HTTP status of the page the driver last loaded, from Chrome's performance log, or None if unknown."""
+    if not hasattr(driver, "get_log"):
+        return None
+    try:
+        entries = driver.get_log("performance")
+    except WebDriverException:
+        return None
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        # Frames load after the page, so the first document response is the page's own
+        if message["method"] == "Network.responseReceived" and message["params"].get("type") == "Document":
+            return message["params"]["response"]["status"]
+    return None
+
+
+def load_page(url):
+    """Renders url in a browser and returns the page source; an error page raises FetchError("http_status")."""
+    driver = driver_factory()
+
+    def navigate(url):
         driver.get(url)
-        page_source = driver.page_source
+        status = document_status(driver)
+        if status is not None and status >= 400:
+            raise status_error(url, status)
+
+    try:
+        rate_limited_fetch(url, navigate)
+        return driver.page_source
+    finally:
         driver.quit()
 
-        # Analyze HTML with BeautifulSoup
-        soup = BeautifulSoup(page_source, "html.parser")
-        scripts = soup.find_all("script", src=True)
-
-        # Debugging: Print all extracted script URLs
-        print("\nExtracted Scripts:")
-        extracted_scripts = [script['src'] for script in scripts]
-        for script in extracted_scripts:
-            print(script)
-
-
-        # Detect trackers
-        tracker_details = []
-        for script in scripts:
-            tracker_url = script['src']
-            for known_url, details in TRACKER_DATABASE.items():
-                if known_url in tracker_url:
-                    tracker_details.append({
-                        "url": tracker_url,
-                        "name": details["name"],
-                        "category": details["category"],
-                        "company": details["company"]
-                    })
-                    break  # Stop checking once a match is found
-
-        # Calculate Privacy Score
-        privacy_score = max(0, 100 - len(tracker_details) * 10)
-
-        return jsonify({
-            "url": url,
-            "trackers": tracker_details,
-            "privacy_score": privacy_score
-        })
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+def run_scan(url, progress=None):
+    started = time.perf_counter()
+    with scan_slots:
+        page_source = load_page(url)
+    page_loaded(progress, url, "browser", len(page_source), started)
+
+    # Analyze HTML, detect trackers and score them in a parse worker
+    return parse_scan(url, page_source, None, progress)
+
+
+def static_scan(url, progress=None):
+    started = time.perf_counter()
+    raw, encoding = rate_limited_fetch(url, lambda url: fetch_page(url, config["scan.timeout"]))
+    page_loaded(progress, url, "static", len(raw), started)
+    # In auto mode a page with a render hint is scanned again in a browser
+    return parse_scan(url, raw, encoding, progress, provisional=tiered_scanner.mode == "auto")
+
+
+def page_loaded(progress, url, tier, characters, started):
+    if progress is not None:
+        progress.put(("page_loaded", {"url": url, "tier": tier, "characters": characters,
+                                      "seconds": round(time.perf_counter() - started, 3)}))
+
+
+def parse_scan(url, raw, encoding, progress, provisional=False):
+    on_trackers = None
+    if progress is not None:
+        on_trackers = lambda hits: progress.put(("trackers", hits))
+    result = pipeline.parse(url, raw, encoding, on_trackers, provisional).result()
+    profiler.add_stacks(result.pop("worker_stacks"), "parse worker")
+    result["timestamp"] = time.time()
+    return result
+
 
 if __name__ == "__main__":
     print("Starting Flask server...")
+    create_app()
+    TRACKERS.start_watching()
     app.run(debug=True)
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from utils.fetching import FetchError
+from utils.metrics import Counters
+
+TIERS = ("auto", "static", "browser")
+
+# Statuses with which sites commonly turn away plain HTTP clients while serving browsers
+BOT_WALL_STATUSES = frozenset((401, 403, 429, 503))
+
+
+class TieredScanner:
+    """Scans from static HTML first and renders in a browser only when the page needs it.
+
+    static_scan and browser_scan take a URL and the progress passed to
+    scan() and return a parse result with a render_hint: None when static
+    HTML is enough, otherwise the reason to escalate. In "static" or
+    "browser" mode only that tier is used.
+    """
+
+    def __init__(self, static_scan, browser_scan, mode="auto"):
+        if mode not in TIERS:
+            raise ValueError(f"Unknown scan tier mode: {mode}")
+        self.static_scan = static_scan
+        self.browser_scan = browser_scan
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._seconds = {"static": 0.0, "browser": 0.0}
+        self.counters = Counters("static_attempts", "served_static", "browser_renders")
+        self.escalations = Counters()
+
+    def scan(self, url, progress=None):
+        reason = None
+        if self.mode != "browser":
+            try:
+                result = self._timed("static", url, progress)
+            except FetchError as e:
+                if self.mode == "static" or e.status not in BOT_WALL_STATUSES:
+                    raise
+                reason = "static_failed"
+            else:
+                reason = result.pop("render_hint")
+                if reason is None or self.mode == "static":
+                    self.counters.incr("served_static")
+                    result["tier"] = "static"
+                    return result
+            self.escalations.incr(reason)
+
+        result = self._timed("browser", url, progress)
+        result.pop("render_hint", None)
+        result["tier"] = "browser"
+        result["escalation"] = reason
+        return result
+
+    def _timed(self, tier, url, progress):
+        self.counters.incr("static_attempts" if tier == "static" else "browser_renders")
+        started = time.perf_counter()
+        try:
+            return (self.static_scan if tier == "static" else self.browser_scan)(url, progress)
+        finally:
+            with self._lock:
+                self._seconds[tier] += time.perf_counter() - started
+
+    def stats(self):
+        counts = self.counters.snapshot()
+        with self._lock:
+            seconds = dict(self._seconds)
+        renders = counts["browser_renders"]
+        browser_average = seconds["browser"] / renders if renders else None
+        return {
+            "mode": self.mode,
+            **counts,
+            "escalations": self.escalations.snapshot(),
+            "seconds": {tier: round(value, 3) for tier, value in seconds.items()},
+            "static_hit_rate": round(counts["served_static"] / counts["static_attempts"], 4)
+            if counts["static_attempts"] else None,
+            # Browser time the static hits would have cost at the observed average render time
+            "browser_seconds_saved": round(counts["served_static"] * browser_average, 3)
+            if browser_average is not None else None,
+        }
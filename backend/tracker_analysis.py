@@ -1 +1,267 @@
- 
+import json
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Incidence keys pack a site ID and a tracker (or company) ID into one int64
+KEY_SHIFT = 20
+KEY_MASK = (1 << KEY_SHIFT) - 1
+
+BUCKET_SECONDS = {
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+}
+
+
+class _Column:
+    """Append-only NumPy column with amortized O(1) growth.
+
+    Appends are buffered in a list and copied into the array in bulk the
+    next time the column is read.
+    """
+
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._filled = 0
+        self._pending = []
+
+    def extend(self, values):
+        self._pending.extend(values)
+
+    def append(self, value):
+        self._pending.append(value)
+
+    @property
+    def size(self):
+        return self._filled + len(self._pending)
+
+    def view(self):
+        if self._pending:
+            size = self.size
+            if size > len(self._data):
+                grown = np.empty(max(len(self._data) * 2, size), dtype=self._data.dtype)
+                grown[:self._filled] = self._data[:self._filled]
+                self._data = grown
+            self._data[self._filled:size] = self._pending
+            self._filled = size
+            self._pending = []
+        return self._data[:self._filled]
+
+
+def _unique(keys):
+    keys = np.sort(keys)
+    if len(keys) < 2:
+        return keys
+    keep = np.empty(len(keys), dtype=bool)
+    keep[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=keep[1:])
+    return keys[keep]
+
+
+def _merge_sorted(existing, keys):
+    """Merges keys into the sorted unique array existing without a full re-sort."""
+    keys = _unique(keys)
+    if not len(existing):
+        return keys
+    pos = np.searchsorted(existing, keys)
+    found = pos < len(existing)
+    found[found] = existing[pos[found]] == keys[found]
+    return np.insert(existing, pos[~found], keys[~found])
+
+
+class _Vocab:
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        index = self.ids.get(name)
+        if index is None:
+            index = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+
+def site_of(url):
+    host = (urlsplit(url if "//" in url else "//" + url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class TrackerCorpus:
+    """Columnar tracker hits of every stored scan, for aggregate queries.
+
+    Each scan adds one row per distinct tracker to the hit columns. Queries
+    work on NumPy views of those columns plus three derived key sets (site x
+    tracker, site x company, scan x category) that are brought up to date by
+    merging in only the hits added since the previous query.
+    """
+
+    def __init__(self):
+        self.sites = _Vocab()
+        self.trackers = _Vocab()
+        self.companies = _Vocab()
+        self.categories = _Vocab()
+        self._tracker_company = _Column(np.int32)
+        self._tracker_category = _Column(np.int32)
+
+        self._scan_site = _Column(np.int64)
+        self._scan_time = _Column(np.float64)
+        self._hit_scan = _Column(np.int64)
+        self._hit_tracker = _Column(np.int64)
+
+        self._site_trackers = np.empty(0, dtype=np.int64)
+        self._site_companies = np.empty(0, dtype=np.int64)
+        self._scan_categories = np.empty(0, dtype=np.int64)
+        self._synced_hits = 0
+
+    @classmethod
+    def from_scans(cls, scans):
+        corpus = cls()
+        for scan in scans:
+            corpus.add_scan(scan["url"], scan["trackers"], scan.get("timestamp"))
+        return corpus
+
+    @classmethod
+    def from_database(cls, db):
+        """Loads every scan stored in a ScanDatabase."""
+        return cls.from_scans(db.all_scans())
+
+    @classmethod
+    def from_json(cls, path):
+        """Loads scans in the format written by the Reports page export."""
+        with open(path) as file:
+            return cls.from_scans(json.load(file))
+
+    @property
+    def scan_count(self):
+        return self._scan_site.size
+
+    def add_scan(self, url, trackers, timestamp=None):
+        scan_id = self._scan_site.size
+        self._scan_site.append(self.sites.intern(site_of(url)))
+        self._scan_time.append(time.time() if timestamp is None else timestamp)
+
+        tracker_ids = []
+        for tracker in trackers:
+            tracker_id = self.trackers.ids.get(tracker["name"])
+            if tracker_id is None:
+                tracker_id = self.trackers.intern(tracker["name"])
+                self._tracker_company.append(self.companies.intern(tracker["company"]))
+                self._tracker_category.append(self.categories.intern(tracker["category"]))
+            tracker_ids.append(tracker_id)
+
+        tracker_ids = sorted(set(tracker_ids))
+        self._hit_scan.extend([scan_id] * len(tracker_ids))
+        self._hit_tracker.extend(tracker_ids)
+
+    def _sync(self):
+        hit_count = self._hit_scan.size
+        if self._synced_hits == hit_count:
+            return
+        hit_scan = self._hit_scan.view()[self._synced_hits:]
+        hit_tracker = self._hit_tracker.view()[self._synced_hits:]
+        site = self._scan_site.view()[hit_scan] << KEY_SHIFT
+        self._site_trackers = _merge_sorted(self._site_trackers, site | hit_tracker)
+        self._site_companies = _merge_sorted(
+            self._site_companies, site | self._tracker_company.view()[hit_tracker])
+        # Scan IDs only grow, so the new pairs sort after all existing ones
+        categories = _unique((hit_scan << KEY_SHIFT) | self._tracker_category.view()[hit_tracker])
+        self._scan_categories = np.concatenate([self._scan_categories, categories])
+        self._synced_hits = hit_count
+
+    def incidence(self):
+        """Returns the sorted, unique site x tracker keys seen so far."""
+        self._sync()
+        return self._site_trackers
+
+    def tracker_site_counts(self):
+        return np.bincount(self.incidence() & KEY_MASK, minlength=len(self.trackers))
+
+    def top_trackers(self, n=10):
+        """Trackers found on the most distinct sites, as (name, site_count) pairs."""
+        return self._top(self.tracker_site_counts(), self.trackers.names, n)
+
+    def top_companies(self, n=10):
+        """Companies found on the most distinct sites, as (name, site_count) pairs."""
+        self._sync()
+        counts = np.bincount(self._site_companies & KEY_MASK, minlength=len(self.companies))
+        return self._top(counts, self.companies.names, n)
+
+    def co_occurring(self, tracker, n=10):
+        """Trackers most often found on the same sites as tracker."""
+        tracker_id = self.trackers.ids.get(tracker)
+        if tracker_id is None:
+            return []
+        incidence = self.incidence()
+        sites = incidence >> KEY_SHIFT
+        host_sites = sites[(incidence & KEY_MASK) == tracker_id]
+        others = incidence[np.isin(sites, host_sites)] & KEY_MASK
+        counts = np.bincount(others, minlength=len(self.trackers))
+        counts[tracker_id] = 0
+        return self._top(counts, self.trackers.names, n)
+
+    def cooccurrence_matrix(self, k=20, chunk_sites=100000):
+        """Site co-occurrence counts among the k most widespread trackers.
+
+        Returns (names, matrix) where matrix[i, j] is the number of sites that
+        have both trackers and the diagonal is each tracker's own site count.
+        """
+        site_counts = self.tracker_site_counts()
+        top = np.argsort(-site_counts, kind="stable")[:k]
+        top = top[site_counts[top] > 0]
+        column = np.full(len(self.trackers), -1, dtype=np.int64)
+        column[top] = np.arange(len(top))
+
+        incidence = self.incidence()
+        incidence = incidence[column[incidence & KEY_MASK] >= 0]
+        # Incidence is sorted by site, so row numbers follow from site changes
+        sites = incidence >> KEY_SHIFT
+        rows = np.zeros(len(sites), dtype=np.int64)
+        np.cumsum(sites[1:] != sites[:-1], out=rows[1:])
+        cols = column[incidence & KEY_MASK]
+
+        matrix = np.zeros((len(top), len(top)), dtype=np.int64)
+        row_count = rows.max() + 1 if len(rows) else 0
+        # Dense per-chunk incidence keeps memory bounded on large corpora
+        for start in range(0, row_count, chunk_sites):
+            mask = (rows >= start) & (rows < start + chunk_sites)
+            dense = np.zeros((min(chunk_sites, row_count - start), len(top)), dtype=np.float32)
+            dense[rows[mask] - start, cols[mask]] = 1
+            matrix += np.rint(dense.T @ dense).astype(np.int64)
+        return [self.trackers.names[i] for i in top], matrix
+
+    def category_trend(self, bucket="day"):
+        """Share of scans per time bucket that contain each category.
+
+        Returns (bucket_starts, category_names, prevalence) where prevalence
+        has one row per bucket and one column per category.
+        """
+        seconds = BUCKET_SECONDS[bucket]
+        scan_bucket = np.floor(self._scan_time.view() / seconds).astype(np.int64)
+        if not len(scan_bucket):
+            return np.empty(0), list(self.categories.names), np.empty((0, len(self.categories)))
+        first = scan_bucket.min()
+        scan_bucket -= first
+        bucket_count = scan_bucket.max() + 1
+
+        self._sync()
+        pairs = self._scan_categories
+        cells = scan_bucket[pairs >> KEY_SHIFT] * len(self.categories) + (pairs & KEY_MASK)
+        counts = np.bincount(cells, minlength=bucket_count * len(self.categories))
+        counts = counts.reshape(bucket_count, len(self.categories))
+
+        scans_per_bucket = np.bincount(scan_bucket, minlength=bucket_count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prevalence = np.where(scans_per_bucket[:, None] > 0, counts / scans_per_bucket[:, None], 0.0)
+        starts = (np.arange(bucket_count) + first) * seconds
+        return starts, list(self.categories.names), prevalence
+
+    @staticmethod
+    def _top(counts, names, n):
+        order = np.argsort(-counts, kind="stable")[:n]
+        return [(names[i], int(counts[i])) for i in order if counts[i] > 0]
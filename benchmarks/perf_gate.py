@@ -0,0 +1,315 @@
+"""Performance regression gate for the scan hot paths.
+
+Times tracker matching, tag extraction, scoring, history persistence and
+report rendering, and compares each against benchmarks/baseline.json.
+Timings are divided by a fixed pure-Python calibration loop timed
+alongside them, so a baseline recorded on one machine stays usable on
+another; the suite runs several times and the median counts. A metric
+fails when it is slower than its baseline by more than its entry in
+"tolerances", or the default "tolerance". Also checks the tracker files
+for duplicate and subsumed patterns, which grow the database without
+changing any result.
+
+Run from the repository root:
+    python -m benchmarks.perf_gate                    # exit 1 on a regression
+    python -m benchmarks.perf_gate --update-baseline  # record new numbers
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from backend.privacy_score import score_batch, score_trackers
+from database.db_manager import ScanDatabase
+from database.snapshot_store import SnapshotStore
+from utils.content_scanner import ContentScanner
+from utils.page_analysis import find_trackers, render_report_html
+from utils.tracker_db import check_tracker_file, parse_tracker_file
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+TRACKER_FILES = (
+    os.path.join(ROOT_DIR, "database", "tracker_database.json"),
+    os.path.join(ROOT_DIR, "database", "known_trackers.json"),
+)
+DEFAULT_TOLERANCE = 0.25
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Registers a setup function returning the callable to time; setup is not timed."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def load_matcher():
+    with open(TRACKER_FILES[0], "rb") as file:
+        return parse_tracker_file(file.read())
+
+
+def synthetic_urls(matcher, count, seed=0):
+    """Script URLs where about one in four contains a tracker pattern."""
+    rng = random.Random(seed)
+    patterns = sorted(matcher.entries)
+    urls = []
+    for i in range(count):
+        path = f"/static/js/chunk-{rng.getrandbits(32):08x}.js?v={i}"
+        if rng.random() < 0.25:
+            urls.append(f"https://{rng.choice(patterns)}{path}")
+        else:
+            urls.append(f"https://cdn{i % 50}.example-{rng.randrange(1000)}.org{path}")
+    return urls
+
+
+def synthetic_page(matcher, scripts=1500, seed=0):
+    """A prettified-looking page with script, iframe, img, link and inline script tags."""
+    rng = random.Random(seed)
+    urls = synthetic_urls(matcher, scripts, seed)
+    lines = ["<!DOCTYPE html>", "<html>", " <head>", "  <title>Benchmark page</title>"]
+    for url in urls[:10]:
+        lines.append(f'  <link rel="preconnect" href="{url}"/>')
+    lines.append("  <script>window.dataLayer = window.dataLayer || []; gtag('config', 'G-XXXX');</script>")
+    lines.append(" </head>")
+    lines.append(" <body>")
+    for i, url in enumerate(urls):
+        tag = ("script", "iframe", "img")[i % 3]
+        if tag == "img":
+            lines.append(f'  <img alt="item {i}" src="{url}"/>')
+        else:
+            lines.append(f'  <{tag} src="{url}"></{tag}>')
+        lines.append(f"  <p>Paragraph {i} with some text {rng.getrandbits(48):x} to pad the page out.</p>")
+    lines.append("  <script>fbq('init', '1234'); console.log('ready');</script>")
+    lines.append(" </body>")
+    lines.append("</html>")
+    return "\n".join(lines)
+
+
+def synthetic_scans(matcher, count, seed=0):
+    rng = random.Random(seed)
+    entries = list(matcher.entries.values())
+    return [[{"name": entry["name"], "category": entry["category"], "company": entry["company"]}
+             for entry in rng.sample(entries, rng.randrange(0, 12))] for _ in range(count)]
+
+
+@benchmark("match_urls")
+def bench_match_urls():
+    matcher = load_matcher()
+    urls = synthetic_urls(matcher, 50000)
+    return lambda: [matcher.match(url) for url in urls]
+
+
+@benchmark("find_trackers")
+def bench_find_trackers():
+    matcher = load_matcher()
+    soups = [BeautifulSoup(synthetic_page(matcher, seed=seed), "html.parser") for seed in range(4)]
+    scanner = ContentScanner()
+    return lambda: [find_trackers(soup, matcher, scanner) for soup in soups]
+
+
+@benchmark("parse_page")
+def bench_parse_page():
+    page = synthetic_page(load_matcher())
+    return lambda: BeautifulSoup(page, "html.parser")
+
+
+@benchmark("score_trackers")
+def bench_score_trackers():
+    scans = synthetic_scans(load_matcher(), 20000)
+    return lambda: [score_trackers(trackers) for trackers in scans]
+
+
+@benchmark("score_batch")
+def bench_score_batch():
+    scans = synthetic_scans(load_matcher(), 20000)
+    return lambda: score_batch(scans)
+
+
+# The storage benchmarks use in-memory databases: commit and fsync time
+# depend on the disk, not on the code, and would swamp the comparison
+
+@benchmark("save_scans")
+def bench_save_scans():
+    scans = synthetic_scans(load_matcher(), 200)
+
+    def run():
+        db = ScanDatabase(":memory:")
+        for i, trackers in enumerate(scans):
+            db.save_scan(f"https://site{i % 40}.example.com/", 50, trackers)
+        db.close()
+    return run
+
+
+@benchmark("search_history")
+def bench_search_history():
+    matcher = load_matcher()
+    scans = synthetic_scans(matcher, 2000)
+    db = ScanDatabase(":memory:")
+    for i, trackers in enumerate(scans):
+        db.save_scan(f"https://site{i % 300}.example.com/page{i % 7}", 50, trackers)
+    names = [entry["name"] for entry in list(matcher.entries.values())[:20]]
+
+    def run():
+        for _ in range(5):
+            db.search("site1")
+            db.search("example", category="Advertising")
+            for name in names:
+                db.search(tracker=name, limit=20)
+    return run
+
+
+@benchmark("snapshot_put_get")
+def bench_snapshot_put_get():
+    page = synthetic_page(load_matcher())
+    lines = page.split("\n")
+
+    def run():
+        store = SnapshotStore(":memory:")
+        for key in range(20):
+            # Successive versions of one page differ by a single line
+            lines[len(lines) // 2] = f"  <p>Version {key}</p>"
+            store.put(key, "\n".join(lines))
+        for key in range(20):
+            store.get(key)
+        store.close()
+    return run
+
+
+@benchmark("render_report")
+def bench_render_report():
+    matcher = load_matcher()
+    page = synthetic_page(matcher, scripts=500)
+    trackers = find_trackers(BeautifulSoup(page, "html.parser"), matcher)
+    return lambda: (render_report_html(page, trackers), render_report_html(page, trackers, only_tracker_lines=True))
+
+
+def calibration_work():
+    """A fixed pure-Python workload; its run time is the unit all metrics are expressed in."""
+    total = 0
+    table = {}
+    for i in range(500_000):
+        table[i & 1023] = total
+        total += i % 7
+    return total
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def best_times(fn, repeat):
+    """Fastest of repeat runs of fn and of the calibration workload, run alternately.
+
+    Alternating means a burst of load on the machine slows both, and the
+    garbage collector is off while timing, as timeit does.
+    """
+    fn()
+    calibration_work()
+    times, units = [], []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            times.append(_timed(fn))
+            units.append(_timed(calibration_work))
+    finally:
+        gc.enable()
+    return min(times), min(units)
+
+
+def check_trackers():
+    problems = []
+    for path in TRACKER_FILES:
+        with open(path, "rb") as file:
+            problems.extend(f"{os.path.basename(path)}: {problem}" for problem in check_tracker_file(file.read()))
+    return problems
+
+
+def measure(names, runs, repeat):
+    """Returns {name: [calibrated time of each run]}; every run times each benchmark once."""
+    timers = {name: BENCHMARKS[name]() for name in names}
+    ratios = {name: [] for name in names}
+    for _ in range(runs):
+        for name, fn in timers.items():
+            seconds, unit = best_times(fn, repeat)
+            ratios[name].append(seconds / unit)
+    return ratios
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Fail when a hot path got slower than its stored baseline.")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float,
+                        help="allowed slowdown as a fraction of the baseline, overriding the stored tolerances")
+    parser.add_argument("--runs", type=int,
+                        help="runs of the whole suite, the median counts (default: 3, or 5 with --update-baseline)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per benchmark and run; the fastest counts")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    except (OSError, ValueError) as e:
+        if not args.update_baseline:
+            print(f"Could not read baseline {args.baseline}: {e}")
+            return 2
+    default_tolerance = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    tolerances = baseline.get("tolerances", {})
+
+    failures = check_trackers()
+    for problem in failures:
+        print(f"TRACKERS  {problem}")
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+        return 2
+
+    runs = args.runs or (5 if args.update_baseline else 3)
+    metrics = {}
+    for name, ratios in measure(args.names or list(BENCHMARKS), max(1, runs), args.repeat).items():
+        metrics[name] = round(statistics.median(ratios), 3)
+        spread = (max(ratios) - min(ratios)) / metrics[name] if metrics[name] else 0.0
+        expected = baseline.get("metrics", {}).get(name)
+        if expected is None:
+            print(f"{'NEW':<9} {name:<18} {metrics[name]:8.3f} units  spread {spread:6.1%}")
+            continue
+        tolerance = args.tolerance if args.tolerance is not None else tolerances.get(name, default_tolerance)
+        change = metrics[name] / expected - 1
+        status = "OK"
+        if change > tolerance:
+            status = "SLOWER"
+            failures.append(name)
+        print(f"{status:<9} {name:<18} {metrics[name]:8.3f} units  spread {spread:6.1%}  "
+              f"{change:+7.1%} vs baseline (allowed {tolerance:+.0%})")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            # Benchmarks left out of this run keep their stored numbers
+            metrics = {**baseline.get("metrics", {}), **metrics}
+            json.dump({"tolerance": default_tolerance, "tolerances": tolerances, "metrics": metrics}, file, indent=2)
+            file.write("\n")
+        print(f"Wrote {args.baseline}")
+        return 1 if failures else 0
+
+    if failures:
+        print(f"{len(failures)} problem(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
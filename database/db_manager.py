@@ -1 +1,318 @@
- 
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from urllib.parse import urlsplit
+
+DEFAULT_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scans.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trackers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    category TEXT NOT NULL,
+    company TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    page TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    tracker_db_version TEXT,
+    trackers TEXT NOT NULL,
+    tracker_ids BLOB NOT NULL,
+    added BLOB NOT NULL,
+    removed BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_page ON scans (page, id);
+CREATE INDEX IF NOT EXISTS scans_score ON scans (score, timestamp);
+CREATE INDEX IF NOT EXISTS scans_timestamp ON scans (timestamp);
+-- Latest tracker set of every page, so a new scan is diffed with one lookup
+CREATE TABLE IF NOT EXISTS pages (
+    page TEXT PRIMARY KEY,
+    last_scan_id INTEGER NOT NULL,
+    tracker_ids BLOB NOT NULL
+);
+-- Full-text index of every scan; rowid is the scan id. Trigrams make URL
+-- fragments and LIKE patterns searchable, not only whole words.
+CREATE VIRTUAL TABLE IF NOT EXISTS scan_search USING fts5 (
+    url, trackers, categories, companies, tokenize = 'trigram'
+);
+CREATE TABLE IF NOT EXISTS scan_facets (
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    scan_id INTEGER NOT NULL,
+    PRIMARY KEY (facet, value, scan_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS facet_counts (
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    scans INTEGER NOT NULL,
+    PRIMARY KEY (facet, value)
+) WITHOUT ROWID;
+"""
+
+# Scan fields each facet is taken from
+FACETS = {"tracker": "name", "category": "category", "company": "company"}
+
+
+def page_key(url):
+    """Identifies a page independently of scheme, www. prefix and trailing slash."""
+    parts = urlsplit(url if "//" in url else "//" + url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    key = host + parts.path.rstrip("/")
+    return f"{key}?{parts.query}" if parts.query else key
+
+
+def _like_pattern(term):
+    """Turns a search term with * and ? wildcards into an unanchored LIKE pattern."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "%" + escaped.replace("*", "%").replace("?", "_") + "%"
+
+
+def _scan_row(row):
+    return {
+        "scan_id": row["id"],
+        "url": row["url"],
+        "score": row["score"],
+        "timestamp": row["timestamp"],
+        "tracker_db_version": row["tracker_db_version"],
+        "trackers": json.loads(row["trackers"]),
+    }
+
+
+def pack_ids(ids):
+    return array("I", ids).tobytes()
+
+
+def unpack_ids(blob):
+    ids = array("I")
+    ids.frombytes(blob)
+    return ids
+
+
+class ScanDatabase:
+    """SQLite store of scan results; the desktop app and the backend each keep one.
+
+    Each scan's trackers are stored as a sorted array of tracker IDs. The
+    previous set of the same page lives in the pages table, so computing
+    what a scan added or removed costs the same however long the history is.
+    """
+
+    def __init__(self, path=DEFAULT_DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._tracker_ids = {row["name"]: row["id"] for row in self._conn.execute("SELECT id, name FROM trackers")}
+        self._tracker_names = {tracker_id: name for name, tracker_id in self._tracker_ids.items()}
+        self._index_missing()
+
+    def close(self):
+        self._conn.close()
+
+    def _intern(self, tracker, new_ids):
+        # Inserted trackers go to new_ids; save_scan caches them after the commit
+        tracker_id = self._tracker_ids.get(tracker["name"]) or new_ids.get(tracker["name"])
+        if tracker_id is None:
+            cursor = self._conn.execute(
+                "INSERT INTO trackers (name, category, company) VALUES (?, ?, ?)",
+                (tracker["name"], tracker["category"], tracker["company"]))
+            tracker_id = cursor.lastrowid
+            new_ids[tracker["name"]] = tracker_id
+        return tracker_id
+
+    def names(self, ids):
+        return [self._tracker_names[tracker_id] for tracker_id in ids]
+
+    def save_scan(self, url, score, trackers, timestamp=None, tracker_db_version=None):
+        """Stores a scan and returns (scan_id, added, removed) tracker names versus the page's previous scan."""
+        page = page_key(url)
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            new_ids = {}
+            with self._conn:
+                ids = sorted({self._intern(tracker, new_ids) for tracker in trackers})
+                row = self._conn.execute("SELECT tracker_ids FROM pages WHERE page = ?", (page,)).fetchone()
+                # The first scan of a page has nothing to compare against
+                previous = set(unpack_ids(row["tracker_ids"])) if row else set(ids)
+                added = sorted(set(ids) - previous)
+                removed = sorted(previous - set(ids))
+
+                cursor = self._conn.execute(
+                    "INSERT INTO scans (url, page, score, timestamp, tracker_db_version, trackers, tracker_ids,"
+                    " added, removed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, page, score, timestamp, tracker_db_version, json.dumps(trackers),
+                     pack_ids(ids), pack_ids(added), pack_ids(removed)))
+                scan_id = cursor.lastrowid
+                self._conn.execute(
+                    "INSERT INTO pages (page, last_scan_id, tracker_ids) VALUES (?, ?, ?)"
+                    " ON CONFLICT (page) DO UPDATE SET last_scan_id = excluded.last_scan_id,"
+                    " tracker_ids = excluded.tracker_ids",
+                    (page, scan_id, pack_ids(ids)))
+                self._index_scan(scan_id, url, trackers)
+            # Cached only once committed; a rolled back insert would leave ids that are not in the table
+            self._tracker_ids.update(new_ids)
+            self._tracker_names.update((tracker_id, name) for name, tracker_id in new_ids.items())
+        return scan_id, self.names(added), self.names(removed)
+
+    def rescore(self, weights_key, score_all):
+        """Recomputes every stored score unless they were last computed with the weights identified by weights_key.
+
+        score_all takes a list of tracker lists and returns their scores.
+        Returns the number of scans whose score changed.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM settings WHERE key = 'score_weights'").fetchone()
+            if row is not None and row["value"] == weights_key:
+                return 0
+            rows = self._conn.execute("SELECT id, score, trackers FROM scans").fetchall()
+            scores = score_all([json.loads(row["trackers"]) for row in rows]) if rows else []
+            changed = [(int(score), row["id"]) for row, score in zip(rows, scores) if score != row["score"]]
+            self._conn.executemany("UPDATE scans SET score = ? WHERE id = ?", changed)
+            self._conn.execute(
+                "INSERT INTO settings (key, value) VALUES ('score_weights', ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value", (weights_key,))
+        return len(changed)
+
+    def _index_scan(self, scan_id, url, trackers):
+        values = {facet: sorted({tracker[field] for tracker in trackers}) for facet, field in FACETS.items()}
+        self._conn.execute(
+            "INSERT INTO scan_search (rowid, url, trackers, categories, companies) VALUES (?, ?, ?, ?, ?)",
+            (scan_id, url, "\n".join(values["tracker"]), "\n".join(values["category"]), "\n".join(values["company"])))
+        rows = [(facet, value, scan_id) for facet, facet_values in values.items() for value in facet_values]
+        self._conn.executemany("INSERT INTO scan_facets (facet, value, scan_id) VALUES (?, ?, ?)", rows)
+        self._conn.executemany(
+            "INSERT INTO facet_counts (facet, value, scans) VALUES (?, ?, 1)"
+            " ON CONFLICT (facet, value) DO UPDATE SET scans = scans + 1",
+            [(facet, value) for facet, value, _ in rows])
+
+    def _index_missing(self):
+        """Indexes scans saved before the search tables existed."""
+        with self._lock, self._conn:
+            last = self._conn.execute("SELECT coalesce(max(rowid), 0) FROM scan_search").fetchone()[0]
+            rows = self._conn.execute("SELECT id, url, trackers FROM scans WHERE id > ? ORDER BY id", (last,)).fetchall()
+            for row in rows:
+                self._index_scan(row["id"], row["url"], json.loads(row["trackers"]))
+
+    def search(self, text="", tracker=None, category=None, company=None, limit=200):
+        """Returns the newest scans matching every word of text and every given facet value.
+
+        Words match anywhere in the URL, tracker names, categories or
+        companies. Words containing * or ? are URL patterns.
+        """
+        matches = []
+        conditions = []
+        params = []
+        for term in text.split():
+            if "*" in term or "?" in term:
+                conditions.append("url LIKE ? ESCAPE '\\'")
+                params.append(_like_pattern(term))
+            elif len(term) < 3:
+                # Trigram MATCH needs at least three characters
+                conditions.append("(url LIKE ? ESCAPE '\\' OR trackers LIKE ? ESCAPE '\\'"
+                                  " OR categories LIKE ? ESCAPE '\\' OR companies LIKE ? ESCAPE '\\')")
+                params.extend([_like_pattern(term)] * 4)
+            else:
+                matches.append('"' + term.replace('"', '""') + '"')
+        facets = [(facet, value) for facet, value in (("tracker", tracker), ("category", category),
+                                                      ("company", company)) if value]
+
+        # Walk the driving index newest first so LIMIT stops the scan early
+        if matches or conditions:
+            if matches:
+                conditions.insert(0, "scan_search MATCH ?")
+                params.insert(0, " ".join(matches))
+            conditions += ["EXISTS (SELECT 1 FROM scan_facets WHERE facet = ? AND value = ?"
+                           " AND scan_id = scan_search.rowid)"] * len(facets)
+            ids = f"SELECT rowid FROM scan_search WHERE {' AND '.join(conditions)} ORDER BY rowid DESC LIMIT ?"
+        elif facets:
+            conditions = ["facet = ? AND value = ?"]
+            conditions += ["EXISTS (SELECT 1 FROM scan_facets AS other WHERE other.facet = ? AND other.value = ?"
+                           " AND other.scan_id = scan_facets.scan_id)"] * (len(facets) - 1)
+            ids = f"SELECT scan_id FROM scan_facets WHERE {' AND '.join(conditions)} ORDER BY scan_id DESC LIMIT ?"
+        else:
+            ids = "SELECT id FROM scans ORDER BY id DESC LIMIT ?"
+        params += [item for facet in facets for item in facet] + [limit]
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, score, timestamp, tracker_db_version, trackers FROM scans"
+                f" WHERE id IN ({ids}) ORDER BY id DESC", params).fetchall()
+        return [_scan_row(row) for row in rows]
+
+    def all_scans(self, batch=1000):
+        """Yields every stored scan, oldest first, reading batch rows at a time."""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, url, score, timestamp, tracker_db_version, trackers FROM scans"
+                    " WHERE id > ? ORDER BY id LIMIT ?", (last, batch)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _scan_row(row)
+            last = rows[-1]["id"]
+
+    def facet_counts(self, facet, limit=None):
+        """Returns (value, number of scans) pairs of a facet, most common first."""
+        if facet not in FACETS:
+            raise ValueError(f"Unknown facet: {facet}")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value, scans FROM facet_counts WHERE facet = ? ORDER BY scans DESC, value LIMIT ?",
+                (facet, -1 if limit is None else limit)).fetchall()
+        return [(row["value"], row["scans"]) for row in rows]
+
+    def ranked_scans(self, since=None, limit=5, best=False):
+        """Returns the lowest (or with best=True, highest) scoring scans made since a timestamp."""
+        order = "DESC" if best else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, score, timestamp, tracker_db_version, trackers FROM scans"
+                f" WHERE timestamp >= ? ORDER BY score {order}, timestamp DESC LIMIT ?",
+                (since or 0, limit)).fetchall()
+        return [_scan_row(row) for row in rows]
+
+    def scan_count(self, since=None):
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM scans WHERE timestamp >= ?", (since or 0,)).fetchone()[0]
+
+    def pages_with(self, facet, value, limit=50):
+        """Returns (url, last scan time) of pages whose scans included a facet value, most recent first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.url, max(s.timestamp) AS last_seen FROM scan_facets AS f"
+                " JOIN scans AS s ON s.id = f.scan_id"
+                " WHERE f.facet = ? AND f.value = ? GROUP BY s.page ORDER BY last_seen DESC LIMIT ?",
+                (facet, value, limit)).fetchall()
+        return [(row["url"], row["last_seen"]) for row in rows]
+
+    def changes(self, url, limit=20):
+        """Returns the most recent scans of url's page that added or removed trackers."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, score, timestamp, added, removed FROM scans"
+                " WHERE page = ? AND (length(added) > 0 OR length(removed) > 0)"
+                " ORDER BY id DESC LIMIT ?",
+                (page_key(url), limit)).fetchall()
+        return [{
+            "scan_id": row["id"],
+            "url": row["url"],
+            "score": row["score"],
+            "timestamp": row["timestamp"],
+            "added": self.names(unpack_ids(row["added"])),
+            "removed": self.names(unpack_ids(row["removed"])),
+        } for row in rows]
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots.db")
+
+# A chunk ends after a line whose CRC has these bits clear, so boundaries
+# follow the content and an edit only changes the chunks around it
+CHUNK_MASK = 0x1F
+MIN_CHUNK = 512
+MAX_CHUNK = 16 * 1024
+HASH_SIZE = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL,
+    refs INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    key INTEGER PRIMARY KEY,
+    chunks BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_accessed ON snapshots (accessed);
+"""
+
+
+def split_chunks(data, mask=CHUNK_MASK, min_size=MIN_CHUNK, max_size=MAX_CHUNK):
+    """Splits bytes into content-defined chunks at line boundaries."""
+    chunks = []
+    current = []
+    size = 0
+    for line in data.splitlines(keepends=True):
+        # Prettified HTML rarely has long lines; cut any that would overflow a chunk
+        while len(line) > max_size:
+            chunks.append(b"".join(current) + line[:max_size - size])
+            line = line[max_size - size:]
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+        if size >= max_size or (size >= min_size and zlib.crc32(line) & mask == 0):
+            chunks.append(b"".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(b"".join(current))
+    return chunks
+
+
+def chunk_hash(chunk):
+    return hashlib.blake2b(chunk, digest_size=HASH_SIZE).digest()
+
+
+class SnapshotStore:
+    """Page HTML stored as deduplicated, compressed, content-defined chunks.
+
+    Each chunk is stored once, keyed by its hash, and reference counted by
+    the snapshots using it. When the compressed size exceeds max_bytes the
+    least recently read snapshots are dropped; snapshots older than
+    max_age seconds are dropped as well.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_FILE, max_bytes=256 * 1024 * 1024, max_age=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._stored_bytes = self._conn.execute("SELECT coalesce(sum(stored), 0) FROM chunks").fetchone()[0]
+
+    @classmethod
+    def from_config(cls, config, root_dir):
+        max_age = config["snapshots.max_age_days"] * 86400 or None
+        return cls(os.path.join(root_dir, config["snapshots.path"]), config["snapshots.max_mb"] * 1024 * 1024, max_age)
+
+    def close(self):
+        self._conn.close()
+
+    def put(self, key, html):
+        """Stores the HTML of scan key, replacing any previous snapshot of it."""
+        data = html.encode("utf-8")
+        chunks = split_chunks(data)
+        hashes = [chunk_hash(chunk) for chunk in chunks]
+        now = time.time()
+        with self._lock, self._conn:
+            self._release(key)
+            known = self._existing(set(hashes))
+            new_chunks = {}
+            for digest, chunk in zip(hashes, chunks):
+                if digest not in known and digest not in new_chunks:
+                    new_chunks[digest] = chunk
+            for digest, chunk in new_chunks.items():
+                compressed = zlib.compress(chunk)
+                self._conn.execute("INSERT INTO chunks (hash, data, size, stored, refs) VALUES (?, ?, ?, ?, 0)",
+                                   (digest, compressed, len(chunk), len(compressed)))
+                self._stored_bytes += len(compressed)
+            self._conn.executemany("UPDATE chunks SET refs = refs + 1 WHERE hash = ?", [(digest,) for digest in hashes])
+            self._conn.execute("INSERT INTO snapshots (key, chunks, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                               (key, b"".join(hashes), len(data), now, now))
+            self._evict(now, keep=key)
+
+    def get(self, key):
+        """Returns the HTML of scan key, or None if it was never stored or has been evicted."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT chunks FROM snapshots WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            hashes = [row[0][i:i + HASH_SIZE] for i in range(0, len(row[0]), HASH_SIZE)]
+            data = {}
+            unique = list(set(hashes))
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                data.update(self._conn.execute(
+                    f"SELECT hash, data FROM chunks WHERE hash IN ({','.join('?' * len(batch))})", batch))
+            self._conn.execute("UPDATE snapshots SET accessed = ? WHERE key = ?", (time.time(), key))
+        return b"".join(zlib.decompress(data[digest]) for digest in hashes).decode("utf-8")
+
+    def has(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM snapshots WHERE key = ?", (key,)).fetchone() is not None
+
+    def stats(self):
+        """Reports how much HTML the snapshots hold and what it takes to store it."""
+        with self._lock:
+            snapshots, logical = self._conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM snapshots").fetchone()
+            chunks, unique = self._conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM chunks").fetchone()
+            stored = self._stored_bytes
+        return {
+            "snapshots": snapshots,
+            "chunks": chunks,
+            "html_bytes": logical,
+            "unique_bytes": unique,
+            "stored_bytes": stored,
+            "saved_bytes": logical - stored,
+            "dedup_ratio": round(logical / unique, 2) if unique else None,
+            "compression_ratio": round(unique / stored, 2) if stored else None,
+        }
+
+    def _existing(self, hashes):
+        hashes = list(hashes)
+        found = set()
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            found.update(digest for digest, in self._conn.execute(
+                f"SELECT hash FROM chunks WHERE hash IN ({','.join('?' * len(batch))})", batch))
+        return found
+
+    def _release(self, key):
+        row = self._conn.execute("SELECT chunks FROM snapshots WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        hashes = [row[0][i:i + HASH_SIZE] for i in range(0, len(row[0]), HASH_SIZE)]
+        self._conn.execute("DELETE FROM snapshots WHERE key = ?", (key,))
+        self._conn.executemany("UPDATE chunks SET refs = refs - 1 WHERE hash = ?", [(digest,) for digest in hashes])
+        unique = list(set(hashes))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            freed = self._conn.execute(
+                f"SELECT coalesce(sum(stored), 0) FROM chunks WHERE refs <= 0 AND hash IN ({placeholders})",
+                batch).fetchone()[0]
+            self._conn.execute(f"DELETE FROM chunks WHERE refs <= 0 AND hash IN ({placeholders})", batch)
+            self._stored_bytes -= freed
+
+    def _evict(self, now, keep):
+        if self.max_age:
+            for old, in self._conn.execute("SELECT key FROM snapshots WHERE created < ?",
+                                           (now - self.max_age,)).fetchall():
+                self._release(old)
+        while self._stored_bytes > self.max_bytes:
+            row = self._conn.execute("SELECT key FROM snapshots WHERE key != ? ORDER BY accessed LIMIT 1",
+                                     (keep,)).fetchone()
+            if row is None:
+                break
+            self._release(row[0])
@@ -0,0 +1,26 @@
+import pytest
+
+from database.db_manager import ScanDatabase
+
+TRACKER = {"name": "Example Pixel", "category": "Advertising", "company": "Example Inc"}
+
+
+def test_failed_save_does_not_cache_tracker_ids(monkeypatch):
+    db = ScanDatabase(":memory:")
+    db.save_scan("https://a.example.com/", 90, [])
+
+    def fail(*args):
+        raise RuntimeError("index write failed")
+
+    monkeypatch.setattr(db, "_index_scan", fail)
+    with pytest.raises(RuntimeError):
+        db.save_scan("https://a.example.com/", 80, [TRACKER])
+    assert db._conn.execute("SELECT count(*) FROM trackers").fetchone()[0] == 0
+    assert TRACKER["name"] not in db._tracker_ids
+
+    monkeypatch.undo()
+    scan_id, added, removed = db.save_scan("https://a.example.com/", 80, [TRACKER])
+    assert (added, removed) == (["Example Pixel"], [])
+    stored = db._conn.execute("SELECT id FROM trackers WHERE name = ?", (TRACKER["name"],)).fetchone()[0]
+    assert db._tracker_ids[TRACKER["name"]] == stored
+    db.close()
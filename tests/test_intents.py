@@ -0,0 +1,19 @@
+from utils.intents import EntityIndex, IntentEngine, default_intents, tokenize
+
+ENTITIES = [("tracker", "Pixel"), ("company", "Pixel"), ("tracker", "Meta Pixel"), ("company", "Meta")]
+
+
+def test_longest_name_wins_and_ties_resolve_the_same_for_any_order():
+    tokens = tokenize("who runs the meta pixel")
+    assert EntityIndex(ENTITIES).find(tokens) == ("tracker", "Meta Pixel")
+
+    found = {EntityIndex(order).find(tokenize("sites with pixel")) for order in (ENTITIES, ENTITIES[::-1])}
+    assert found == {("company", "Pixel")}
+
+
+def test_parse_accepts_a_prebuilt_index():
+    engine = IntentEngine(*default_intents())
+    index = EntityIndex(ENTITIES)
+
+    assert engine.parse("which sites use meta pixel", index).entity == ("tracker", "Meta Pixel")
+    assert engine.parse("which sites use meta pixel", ENTITIES).entity == ("tracker", "Meta Pixel")
@@ -0,0 +1,28 @@
+import os
+
+from utils.profiling import Profiler
+
+
+def test_sessions_of_one_scan_are_saved_separately(tmp_path):
+    profiler = Profiler(str(tmp_path), threshold=0.0, interval=0.001)
+    for _ in range(2):
+        with profiler.session("scan_website") as profile:
+            profile.key = 7
+
+    paths = [entry["path"] for entry in profiler.worst()]
+    assert len(set(paths)) == 2
+    assert all(path.startswith("scan-7-scan_website-") for path in paths)
+    assert all(os.path.exists(tmp_path / path) for path in paths)
+
+
+def test_stacks_from_another_process_join_the_open_session(tmp_path):
+    profiler = Profiler(str(tmp_path), threshold=0.0, interval=0.001)
+    worker_stacks = {"parse_page (pipeline.py:1);find_trackers (page_analysis.py:1)": 5}
+
+    profiler.add_stacks(worker_stacks, "parse worker")
+    with profiler.session("scan_website") as profile:
+        profiler.add_stacks(worker_stacks, "parse worker")
+
+    assert profile.stacks["parse worker;parse_page (pipeline.py:1);find_trackers (page_analysis.py:1)"] == 5
+    with open(tmp_path / profiler.worst()[0]["path"]) as file:
+        assert "parse worker;parse_page" in file.read()
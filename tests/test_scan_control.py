@@ -0,0 +1,141 @@
+import threading
+import time
+import types
+
+import pytest
+
+from backend import scan_control
+from backend.scan_control import DomainRateLimiter, RateLimited, ResultCache, SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scan_control, "time", types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def test_single_flight_coalesces_concurrent_callers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def scan():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"score": 80}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", scan)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", scan))) for _ in range(7)]
+    for thread in followers:
+        thread.start()
+    # Followers register before the leader finishes
+    deadline = time.monotonic() + 5
+    while flight.counters.get("coalesced") < len(followers) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == [{"score": 80}] * 8
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert flight.stats() == {"executed": 1, "coalesced": 7, "failed": 0, "in_flight": 0}
+
+
+def test_single_flight_shares_errors_and_forgets_finished_calls():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 1) == (1, False)
+    assert flight.stats()["failed"] == 1
+
+
+def test_bucket_allows_burst_then_delays_and_refills(clock):
+    limiter = DomainRateLimiter(rate=2.0, burst=3, max_wait=1.0)
+    for _ in range(3):
+        limiter.acquire("example.com")
+    assert clock.slept == []
+
+    # The fourth token is half a second away at two tokens per second
+    limiter.acquire("example.com")
+    assert clock.slept == [pytest.approx(0.5)]
+
+    clock.now += 10
+    for _ in range(3):
+        limiter.acquire("example.com")
+    assert len(clock.slept) == 1
+    assert limiter.stats()["delayed"] == 1
+
+
+def test_bucket_rejects_with_retry_after(clock):
+    limiter = DomainRateLimiter(rate=1.0, burst=1, max_wait=0.5)
+    limiter.acquire("example.com")
+    with pytest.raises(RateLimited) as raised:
+        limiter.acquire("example.com")
+    assert raised.value.domain == "example.com"
+    assert raised.value.retry_after == pytest.approx(1.0)
+    # Other domains have their own budget
+    limiter.acquire("other.org")
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_limiter_evicts_least_recently_used_domain(clock):
+    limiter = DomainRateLimiter(rate=1.0, burst=1, max_wait=0.0, max_domains=2)
+    limiter.acquire("a.com")
+    limiter.acquire("b.com")
+    limiter.acquire("c.com")
+    assert limiter.stats()["domains"] == 2
+    # a.com was evicted, so it starts again with a full bucket
+    limiter.acquire("a.com")
+    with pytest.raises(RateLimited):
+        limiter.acquire("c.com")
+
+
+def test_cache_expires_entries(clock):
+    cache = ResultCache(max_size=10, ttl=60)
+    cache.put("url", {"score": 1})
+    clock.now += 59
+    assert cache.get("url") == {"score": 1}
+    clock.now += 2
+    assert cache.get("url") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 0}
+
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = ResultCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_disabled_without_ttl(clock):
+    cache = ResultCache(max_size=2, ttl=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
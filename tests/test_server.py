@@ -0,0 +1,159 @@
+import json
+import threading
+
+import pytest
+
+from backend import server
+
+PAGE = ('<html><head><script src="https://www.google-analytics.com/analytics.js"></script></head>'
+        '<body><p>An article long enough to be read without a browser.</p></body></html>')
+
+
+class FakeDriver:
+    """Stands in for Chrome: serves pages from a dict and reports their status in a performance log."""
+
+    def __init__(self, pages, loads):
+        self.pages = pages
+        self.loads = loads
+        self.page_source = ""
+        self.status = None
+
+    def get(self, url):
+        self.loads.append(url)
+        self.status, self.page_source = self.pages[url]
+        if self.pages.get("release") is not None:
+            self.pages["release"].wait(10)
+
+    def get_log(self, kind):
+        message = {"method": "Network.responseReceived",
+                   "params": {"type": "Document", "response": {"status": self.status}}}
+        return [{"message": json.dumps({"message": message})}]
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("server")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("PRIVACYLENS_CONFIG", str(directory / "config.json"))
+        patch.setenv("PRIVACYLENS_DATABASE_SERVER_PATH", str(directory / "scans.db"))
+        patch.setenv("PRIVACYLENS_TRACKERS_INDEX_FILE", "")
+        patch.setenv("PRIVACYLENS_SCAN_TIERING", "browser")
+        patch.setenv("PRIVACYLENS_PIPELINE_PARSE_WORKERS", "1")
+        patch.setenv("PRIVACYLENS_SERVER_RESULT_CACHE_TTL", "300")
+        app = server.create_app()
+    yield app
+    server.pipeline.close()
+    server.scan_db.close()
+
+
+@pytest.fixture
+def pages(app, monkeypatch):
+    """Maps URL to (status, html) for the fake browser to serve; pages.loads lists the URLs rendered.
+
+    A threading.Event under "release" holds every render until it is set.
+    """
+    pages = Pages()
+    monkeypatch.setattr(server, "driver_factory", lambda: FakeDriver(pages, pages.loads))
+    return pages
+
+
+class Pages(dict):
+    def __init__(self):
+        super().__init__()
+        self.loads = []
+
+
+def stream(app, url):
+    """Returns the (event, data) pairs of an NDJSON scan stream."""
+    response = app.test_client().get("/scan/stream", query_string={"url": url, "format": "ndjson"})
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return [(event.pop("event"), event) for event in events]
+
+
+def test_error_page_is_reported_and_not_recorded(app, pages):
+    url = "https://missing.example.com/"
+    pages[url] = (404, "<html><body>Not found</body></html>")
+
+    response = app.test_client().get("/scan", query_string={"url": url})
+
+    assert response.status_code == 502
+    assert response.get_json()["failure"] == "http_status"
+    assert response.get_json()["status"] == 404
+    assert server.scan_db.search("missing.example.com") == []
+    assert server.result_cache.get(url) is None
+
+
+def test_page_is_scanned_and_recorded(app, pages):
+    url = "https://news.example.com/"
+    pages[url] = (200, PAGE)
+
+    response = app.test_client().get("/scan", query_string={"url": url})
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert [tracker["name"] for tracker in result["trackers"]] == ["Google Analytics"]
+    assert len(server.scan_db.search("news.example.com")) == 1
+
+
+def test_stream_events_arrive_in_order_and_replay_from_cache(app, pages):
+    url = "https://blog.example.com/"
+    pages[url] = (200, PAGE)
+
+    events = stream(app, url)
+    assert [name for name, _ in events] == ["fetch_started", "page_loaded", "tracker", "score"]
+    assert events[1][1]["tier"] == "browser"
+    assert events[2][1]["name"] == "Google Analytics"
+    assert events[3][1]["source"] == "scan"
+
+    replay = stream(app, url)
+    assert [name for name, _ in replay] == ["fetch_started", "tracker", "score"]
+    assert replay[2][1]["source"] == "cache"
+    assert replay[2][1]["scan_id"] == events[3][1]["scan_id"]
+    assert pages.loads == [url]
+
+
+def test_concurrent_streams_share_one_scan_and_one_token(app, pages):
+    url = "https://shop.example.com/"
+    pages[url] = (200, PAGE)
+    pages["release"] = threading.Event()
+    allowed = server.domain_limiter.stats()["allowed"]
+    coalesced = server.scan_flight.stats()["coalesced"]
+    results = []
+
+    def client():
+        results.append(stream(app, url))
+
+    threads = [threading.Thread(target=client) for _ in range(2)]
+    threads[0].start()
+    while not pages.loads:
+        threading.Event().wait(0.01)
+    threads[1].start()
+    while server.scan_flight.stats()["coalesced"] == coalesced:
+        threading.Event().wait(0.01)
+    pages["release"].set()
+    for thread in threads:
+        thread.join(10)
+
+    assert pages.loads == [url]
+    assert server.domain_limiter.stats()["allowed"] == allowed + 1
+    assert sorted(events[-1][1]["source"] for events in results) == ["scan", "shared"]
+    for events in results:
+        assert [name for name, _ in events if name == "tracker"] == ["tracker"]
+
+
+def test_escalated_scan_takes_a_token_per_fetch(app, pages, monkeypatch):
+    url = "https://spa.example.com/"
+    shell = b'<html><body><div id="root"></div></body></html>'
+    pages[url] = (200, PAGE)
+    monkeypatch.setattr(server, "fetch_page", lambda url, timeout: (shell, "utf-8"))
+    monkeypatch.setattr(server.tiered_scanner, "mode", "auto")
+    allowed = server.domain_limiter.stats()["allowed"]
+
+    response = app.test_client().get("/scan", query_string={"url": url})
+
+    assert response.status_code == 200
+    assert (response.get_json()["tier"], response.get_json()["escalation"]) == ("browser", "spa_shell")
+    assert server.domain_limiter.stats()["allowed"] == allowed + 2
@@ -0,0 +1,81 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from backend.tiering import TieredScanner
+from utils.fetching import FetchError
+from utils.page_analysis import browser_reason
+
+ARTICLE = "<p>" + "A paragraph of server-rendered article text. " * 10 + "</p>"
+NOSCRIPT = "<noscript>You need to enable JavaScript to run this app.</noscript>"
+
+
+def reason(html):
+    return browser_reason(BeautifulSoup(html, "html.parser"), min_body_text=100)
+
+
+@pytest.mark.parametrize("html, expected", [
+    (f"<html><body>{ARTICLE}</body></html>", None),
+    ('<html><head><script src="https://www.googletagmanager.com/gtm.js?id=GTM-1"></script></head>'
+     f"<body>{ARTICLE}</body></html>", "tag_manager"),
+    ("<html><head><script>(function(w){w.dataLayer.push({'gtm.start': 1})})(window)</script></head>"
+     f"<body>{ARTICLE}</body></html>", "tag_manager"),
+    (f'<html><body><div id="root"></div>{ARTICLE}</body></html>', "spa_shell"),
+    (f"<html><body>{NOSCRIPT}<header>Shop</header></body></html>", "spa_shell"),
+    (f"<html><body>{NOSCRIPT}{ARTICLE}</body></html>", None),
+    ("<html><body><p>Loading</p></body></html>", "empty_body"),
+    ("<html><head><title>No body</title></head></html>", "empty_body"),
+])
+def test_browser_reason(html, expected):
+    assert reason(html) == expected
+
+
+def static_result(render_hint):
+    return {"trackers": [], "render_hint": render_hint}
+
+
+def browser_result():
+    return {"trackers": [], "render_hint": "tag_manager"}
+
+
+def test_static_page_is_served_without_a_browser():
+    rendered = []
+    scanner = TieredScanner(lambda url, progress: static_result(None),
+                            lambda url, progress: rendered.append(url) or browser_result())
+
+    result = scanner.scan("https://example.com/")
+
+    assert result["tier"] == "static"
+    assert rendered == []
+    assert scanner.stats()["served_static"] == 1
+
+
+@pytest.mark.parametrize("hint", ["tag_manager", "spa_shell", "empty_body"])
+def test_render_hint_escalates_to_the_browser(hint):
+    scanner = TieredScanner(lambda url, progress: static_result(hint), lambda url, progress: browser_result())
+
+    result = scanner.scan("https://example.com/")
+
+    assert (result["tier"], result["escalation"]) == ("browser", hint)
+    assert "render_hint" not in result
+    assert scanner.stats()["escalations"] == {hint: 1}
+
+
+@pytest.mark.parametrize("status, escalates", [(403, True), (429, True), (503, True), (404, False), (500, False)])
+def test_static_failure_escalates_only_for_bot_walls(status, escalates):
+    def static_scan(url, progress):
+        raise FetchError("http_status", url, f"HTTP {status}", status=status)
+
+    scanner = TieredScanner(static_scan, lambda url, progress: browser_result())
+
+    if escalates:
+        assert scanner.scan("https://example.com/")["escalation"] == "static_failed"
+    else:
+        with pytest.raises(FetchError):
+            scanner.scan("https://example.com/")
+
+
+def test_static_mode_never_escalates():
+    scanner = TieredScanner(lambda url, progress: static_result("spa_shell"),
+                            lambda url, progress: pytest.fail("rendered in static mode"), mode="static")
+
+    assert scanner.scan("https://example.com/")["tier"] == "static"
@@ -0,0 +1,45 @@
+import os
+
+from utils.tracker_db import parse_tracker_file
+from utils.tracker_index import build_index, build_path, load_index
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACKER_FILE = os.path.join(ROOT_DIR, "database", "tracker_database.json")
+
+
+def load_matcher():
+    with open(TRACKER_FILE, "rb") as file:
+        return parse_tracker_file(file.read())
+
+
+def test_mapped_index_matches_like_the_compiled_database(tmp_path):
+    matcher = load_matcher()
+    path = str(tmp_path / "trackers.idx")
+    build_index(matcher, path)
+    index = load_index(path, TRACKER_FILE)
+
+    assert len(index) == len(matcher)
+    assert index.version == matcher.version
+    for pattern, entry in matcher.entries.items():
+        url = f"https://cdn.example.org/{pattern}/lib.js?ref={pattern}"
+        assert index.lookup(pattern) == entry
+        assert index.match(url) == matcher.match(url)
+        assert index.find_all(url) == matcher.find_all(url)
+    assert index.match("https://example.org/app.js") is None
+
+
+def test_rebuild_writes_a_new_file_and_keeps_the_old_mapping_usable(tmp_path):
+    matcher = load_matcher()
+    path = str(tmp_path / "trackers.idx")
+    build_index(matcher, path)
+    first = load_index(path)
+
+    build_index(matcher, path)
+    second = load_index(path)
+
+    # The earlier build is gone where a mapped file can be deleted, or waits for a later build
+    builds = [name for name in os.listdir(tmp_path) if name != "trackers.idx"]
+    assert os.path.basename(build_path(path)) in builds
+    assert len(builds) <= 2
+    pattern = next(iter(matcher.entries))
+    assert first.lookup(pattern) == second.lookup(pattern) == matcher.entries[pattern]
@@ -1,49 +1,53 @@
+import os
 import sys
-import requests
 from bs4 import BeautifulSoup
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView,
-    QStackedLayout, QFrame, QTextEdit, QDialog, QScrollArea, QCheckBox, QMessageBox, QFileDialog, QSpinBox, QComboBox, QGroupBox, QFormLayout
+    QStackedLayout, QFrame, QTextEdit, QDialog, QScrollArea, QCheckBox, QMessageBox, QFileDialog, QSpinBox, QDoubleSpinBox, QComboBox, QGroupBox, QFormLayout
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import QObject, QThread, Qt, pyqtSignal
 from PyQt6.QtGui import QIcon, QTextCursor
-import html
 import json
-from trackers import KNOWN_TRACKERS  # Import the KNOWN_TRACKERS dictionary
-
-def scan_url(url):
-    try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "lxml")
-        trackers_found = []
-
-        for tag in soup.find_all(["script", "iframe", "img"]):
-            src = tag.get("src") or tag.get("data-src")
-            if src:
-                for keyword, (category, company) in KNOWN_TRACKERS.items():
-                    if keyword in src:
-                        trackers_found.append({
-                            "name": keyword,
-                            "category": category,
-                            "company": company,
-                            "url": src
-                        })
-                        break
-
-        return trackers_found, soup.prettify()
-    except Exception as e:
-        print(f"Scan failed: {e}")
-        return [], ""
+import sqlite3
+import time
+from contextlib import nullcontext
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trackers import TRACKERS
+from backend.privacy_score import ScoreWeights, score_trackers, score_batch
+from database.db_manager import ScanDatabase
+from database.snapshot_store import SnapshotStore
+from utils.config import ROOT_DIR, ConfigError, load_config
+from utils.content_scanner import ContentScanner
+from utils.fetching import Fetcher, FetchError
+from utils.intents import EntityIndex, IntentEngine, default_intents
+from utils.page_analysis import find_trackers, render_report_html
+from utils.profiling import Profiler
+
+def scan_url(url, fetcher, content_scanner=None):
+    """Fetches and matches a page; raises FetchError when the page could not be fetched."""
+    # Use one version of the tracker database for the whole scan
+    matcher = TRACKERS.current()
+    response = fetcher.get(url)
+    soup = BeautifulSoup(response.text, "lxml")
+    trackers_found = find_trackers(soup, matcher, content_scanner)
+    return trackers_found, soup.prettify(), matcher.version
 
 class DetailedReportDialog(QDialog):
-    def __init__(self, html_content, trackers):
+    def __init__(self, load_html, trackers, profiler=None, scan_id=None):
         super().__init__()
         self.setWindowTitle("Detailed Tracker Report")
         self.setMinimumSize(800, 600)
 
-        self.original_html = html_content
+        # Page source is read from the snapshot store only when a report is opened
+        self.original_html = load_html()
+        if self.original_html is None:
+            self.original_html = "The page source of this scan is no longer stored."
         self.trackers = trackers
+        self.profiler = profiler
+        self.scan_id = scan_id
 
         self.layout = QVBoxLayout(self)
         self.filter_checkbox = QCheckBox("Show only tracker code")
@@ -62,32 +66,69 @@ class DetailedReportDialog(QDialog):
         self.update_view()
 
     def update_view(self):
-        escaped_html = html.escape(self.original_html)
-        if self.filter_checkbox.isChecked():
-            lines = escaped_html.split('\n')
-            tracker_lines = [line for line in lines if any(html.escape(t['name']) in line for t in self.trackers)]
-            escaped_html = '\n'.join(tracker_lines)
-
-        for tracker in self.trackers:
-            name = html.escape(tracker["name"])
-            highlight = f'<a href="#" style="text-decoration:none; background-color: yellow; border: 1px dashed orange; color: black;" title="Click for tracker info">{name}</a>'
-            escaped_html = escaped_html.replace(name, highlight)
-
-        self.report_view.setHtml(f"<pre style='font-family: monospace;'>{escaped_html}</pre>")
+        with self.profiler.session("update_view", self.scan_id) if self.profiler else nullcontext():
+            report = render_report_html(self.original_html, self.trackers, self.filter_checkbox.isChecked())
+            self.report_view.setHtml(report)
 
     def eventFilter(self, source, event):
         if event.type() == event.Type.MouseButtonPress:
             cursor = self.report_view.cursorForPosition(event.position().toPoint())
             cursor.select(QTextCursor.SelectionType.WordUnderCursor)
             word = cursor.selectedText()
-            if word in KNOWN_TRACKERS:
-                category, company = KNOWN_TRACKERS[word]
+            tracker = TRACKERS.current().lookup(word)
+            if tracker:
                 QMessageBox.information(self, "Tracker Info",
-                    f"Tracker: {word}\nCategory: {category}\nCompany: {company}")
+                    f"Tracker: {word}\nCategory: {tracker['category']}\nCompany: {tracker['company']}")
         return super().eventFilter(source, event)
 
+class ChatWorker(QObject):
+    """Answers chat messages on a background thread with its own scan history connection."""
+
+    answer_line = pyqtSignal(str)
+    answer_done = pyqtSignal()
+
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = db_path
+        self.db = None
+        self.engine = IntentEngine(*default_intents())
+        self._entities = None
+        self._entities_version = None
+
+    def entities(self):
+        """Tracker and company names the chat recognizes, indexed once and again after scans or tracker changes."""
+        if self._entities is None or self._entities_version != TRACKERS.version:
+            names = {(facet, value) for facet in ("company", "tracker") for value, _ in self.db.facet_counts(facet)}
+            for entry in TRACKERS.current().entries.values():
+                names.add(("company", entry["company"]))
+                names.add(("tracker", entry["name"]))
+            self._entities = EntityIndex(names)
+            self._entities_version = TRACKERS.version
+        return self._entities
+
+    def refresh_entities(self):
+        """Called when a scan was saved, which may have added names."""
+        self._entities = None
+
+    def answer(self, message):
+        try:
+            if self.db is None:
+                self.db = ScanDatabase(self.db_path)
+            for line in self.engine.respond(message, self.db, self.entities()):
+                self.answer_line.emit(line)
+        except sqlite3.Error as e:
+            self.answer_line.emit(f"Sorry, I could not read your scan history: {e}")
+        except Exception as e:
+            # An exception escaping a slot aborts the app, so it is reported as the answer instead
+            print(f"Chat answer to {message!r} failed: {e!r}")
+            self.answer_line.emit(f"Sorry, something went wrong while answering: {e}")
+        self.answer_done.emit()
+
+
 class ChatWindow(QDialog):
-    def __init__(self):
+    ask = pyqtSignal(str)
+
+    def __init__(self, db_path):
         super().__init__()
         self.setWindowTitle("Chat")
         self.setGeometry(200, 200, 400, 300)
@@ -96,6 +137,7 @@ class ChatWindow(QDialog):
         self.chat_box.setReadOnly(True)
         self.chat_input = QLineEdit()
         self.chat_input.setPlaceholderText("Type a message...")
+        self.chat_input.returnPressed.connect(self.send_message)
         self.chat_send_button = QPushButton("Send")
         self.chat_send_button.clicked.connect(self.send_message)
 
@@ -106,38 +148,55 @@ class ChatWindow(QDialog):
 
         self.setLayout(self.chat_layout)
 
+        # History questions can take a while, so they are answered off the GUI thread
+        self.worker_thread = QThread()
+        self.worker = ChatWorker(db_path)
+        self.worker.moveToThread(self.worker_thread)
+        self.ask.connect(self.worker.answer)
+        self.worker.answer_line.connect(self.show_answer_line)
+        self.worker.answer_done.connect(self.end_answer)
+        self.finished.connect(self.stop_worker)
+        self.worker_thread.start()
+        self.answer_started = False
+
     def send_message(self):
         message = self.chat_input.text().strip()
         if message:
             self.chat_box.append(f"You: {message}")
-            response = self.get_chat_response(message)
-            self.chat_box.append(f"Bot: {response}")
+            self.ask.emit(message)
             self.chat_input.clear()
 
-    def get_chat_response(self, message):
-        # Rule-based responses
-        message = message.lower()
-        if "hello" in message or "hi" in message:
-            return "Hello! How can I assist you today?"
-        elif "scan" in message:
-            return "To scan a website, please go to the dashboard and enter the URL."
-        elif "report" in message:
-            return "You can view previous scan reports in the Reports section."
-        elif "settings" in message:
-            return "You can change the settings in the Settings section."
-        elif "export" in message:
-            return "You can export the reports by clicking the Export Reports button in the Reports section."
-        else:
-            return "I'm sorry, I didn't understand that. Can you please rephrase?"
+    def show_answer_line(self, line):
+        self.chat_box.append(line if self.answer_started else f"Bot: {line}")
+        self.answer_started = True
+
+    def end_answer(self):
+        self.answer_started = False
+
+    def stop_worker(self):
+        self.worker_thread.quit()
+        self.worker_thread.wait()
 
 class PrivacyLensApp(QWidget):
-    def __init__(self):
+    # Emitted after a scan is stored in the history
+    scan_saved = pyqtSignal()
+
+    def __init__(self, config):
         super().__init__()
         self.setWindowTitle("Privacy Lens")
         self.setGeometry(100, 100, 1000, 700)
-        self.setStyleSheet(self.light_theme())
+        self.config = config
+        self.score_weights = ScoreWeights.with_overrides(config["score.category_weights"], config["score.company_weights"])
+        self.content_scanner = ContentScanner.from_config(config)
+        self.fetcher = Fetcher.from_config(config)
+        self.profiler = Profiler.from_config(config, ROOT_DIR)
+        self.setStyleSheet(self.dark_theme() if config["ui.theme"] == "Dark" else self.light_theme())
 
         self.scan_history = []
+        self.scan_db = ScanDatabase(os.path.join(ROOT_DIR, config["database.path"]))
+        # Stored scores follow the score.* weights in effect
+        self.rescore_history(self.score_weights)
+        self.snapshots = SnapshotStore.from_config(config, ROOT_DIR)
 
         self.main_layout = QHBoxLayout(self)
         self.sidebar_layout = QVBoxLayout()
@@ -201,8 +260,8 @@ class PrivacyLensApp(QWidget):
         self.dashboard_layout.addLayout(self.search_layout)
 
         self.tracker_table = QTableWidget()
-        self.tracker_table.setColumnCount(4)
-        self.tracker_table.setHorizontalHeaderLabels(["URL", "Privacy Score", "Trackers", "Report"])
+        self.tracker_table.setColumnCount(5)
+        self.tracker_table.setHorizontalHeaderLabels(["URL", "Privacy Score", "Trackers", "Changes", "Report"])
         self.tracker_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.dashboard_layout.addWidget(self.tracker_table)
 
@@ -219,7 +278,26 @@ class PrivacyLensApp(QWidget):
         self.reports_table.setHorizontalHeaderLabels(["URL", "Privacy Score", "Trackers", "Report"])
         self.reports_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.reports_layout.addWidget(QLabel("Previous Scan Reports"))
+
+        # Searches the whole scan history; an empty search lists this session's scans
+        self.report_search_layout = QHBoxLayout()
+        self.report_search_input = QLineEdit()
+        self.report_search_input.setPlaceholderText("Search URL, tracker, category or company (* and ? match URLs)...")
+        self.report_search_input.returnPressed.connect(self.populate_reports_table)
+        self.category_filter = QComboBox()
+        self.category_filter.activated.connect(self.populate_reports_table)
+        self.company_filter = QComboBox()
+        self.company_filter.activated.connect(self.populate_reports_table)
+        self.report_search_button = QPushButton("Search")
+        self.report_search_button.clicked.connect(self.populate_reports_table)
+        self.report_search_layout.addWidget(self.report_search_input)
+        self.report_search_layout.addWidget(self.category_filter)
+        self.report_search_layout.addWidget(self.company_filter)
+        self.report_search_layout.addWidget(self.report_search_button)
+        self.reports_layout.addLayout(self.report_search_layout)
         self.reports_layout.addWidget(self.reports_table)
+        self.snapshot_label = QLabel()
+        self.reports_layout.addWidget(self.snapshot_label)
 
         # Add Export Button
         self.export_button = QPushButton("Export Reports")
@@ -233,13 +311,19 @@ class PrivacyLensApp(QWidget):
 
         # Add settings options
         self.notifications_checkbox = QCheckBox("Enable Notifications")
+        self.notifications_checkbox.setChecked(config["ui.notifications"])
         self.scan_interval_spinbox = QSpinBox()
         self.scan_interval_spinbox.setRange(1, 60)
-        self.scan_interval_spinbox.setValue(10)
+        self.scan_interval_spinbox.setValue(config["ui.scan_interval"])
         self.theme_combobox = QComboBox()
         self.theme_combobox.addItems(["Light", "Dark"])
+        self.theme_combobox.setCurrentText(config["ui.theme"])
         self.language_combobox = QComboBox()
         self.language_combobox.addItems(["English", "Spanish", "French", "German", "Chinese"])
+        self.language_combobox.setCurrentText(config["ui.language"])
+        self.timeout_spinbox = QDoubleSpinBox()
+        self.timeout_spinbox.setRange(0.5, 300)
+        self.timeout_spinbox.setValue(config["scan.timeout"])
 
         # Group settings
         general_settings_group = QGroupBox("General Settings")
@@ -254,8 +338,14 @@ class PrivacyLensApp(QWidget):
         appearance_settings_layout.addRow(QLabel("Language:"), self.language_combobox)
         appearance_settings_group.setLayout(appearance_settings_layout)
 
+        performance_settings_group = QGroupBox("Performance Settings")
+        performance_settings_layout = QFormLayout()
+        performance_settings_layout.addRow(QLabel("Request Timeout (seconds):"), self.timeout_spinbox)
+        performance_settings_group.setLayout(performance_settings_layout)
+
         self.settings_layout.addWidget(general_settings_group)
         self.settings_layout.addWidget(appearance_settings_group)
+        self.settings_layout.addWidget(performance_settings_group)
 
         self.save_settings_button = QPushButton("Save Settings")
         self.save_settings_button.setStyleSheet("padding: 8px; background-color: #3f51b5; color: white; border-radius: 5px;")
@@ -278,45 +368,124 @@ class PrivacyLensApp(QWidget):
 
     def show_reports(self):
         self.stack.setCurrentWidget(self.reports_widget)
+        self.populate_facet_filters()
         self.populate_reports_table()
 
     def show_settings(self):
         self.stack.setCurrentWidget(self.settings_widget)
 
     def open_chat(self):
-        self.chat_window = ChatWindow()
+        self.chat_window = ChatWindow(self.scan_db.path)
+        self.scan_saved.connect(self.chat_window.worker.refresh_entities)
         self.chat_window.exec()
 
     def perform_scan(self):
         url = self.url_input.text().strip()
         if not url.startswith("http"):
             url = "http://" + url
-        trackers, html = scan_url(url)
-        score = max(0, 100 - (len(trackers) * 3))
-
-        result = {"url": url, "score": score, "trackers": trackers, "html": html}
+        # Slow scans are profiled and saved under their scan ID
+        with self.profiler.session("scan_url") as profile:
+            failure = None
+            try:
+                trackers, html, tracker_db_version = scan_url(url, self.fetcher, self.content_scanner)
+                score = score_trackers(trackers, self.score_weights)
+                result = {"url": url, "score": score, "trackers": trackers, "timestamp": time.time(),
+                          "tracker_db_version": tracker_db_version}
+                result["scan_id"], added, removed = self.scan_db.save_scan(
+                    url, score, trackers, result["timestamp"], tracker_db_version)
+                profile.key = scan_id = result["scan_id"]
+                self.snapshots.put(scan_id, html)
+            except FetchError as e:
+                failure_kind, failure = e.kind, str(e)
+            except Exception as e:
+                # An exception escaping a slot aborts the app, so anything unexpected is reported instead
+                print(f"Scan of {url} failed: {e!r}")
+                failure_kind, failure = "error", f"An unexpected error occurred while scanning {url}: {e}"
+
+        if failure is not None:
+            # A page that could not be fetched gets no score and no history entry
+            self.tracker_table.setRowCount(1)
+            self.tracker_table.setItem(0, 0, QTableWidgetItem(url))
+            self.tracker_table.setItem(0, 1, QTableWidgetItem(f"Scan failed ({failure_kind})"))
+            for column in (2, 3):
+                self.tracker_table.setItem(0, column, QTableWidgetItem("-"))
+            self.tracker_table.removeCellWidget(0, 4)
+            QMessageBox.warning(self, "Scan Failed", failure)
+            return
         self.scan_history.append(result)
+        self.scan_saved.emit()
 
         self.tracker_table.setRowCount(1)
         self.tracker_table.setItem(0, 0, QTableWidgetItem(url))
         self.tracker_table.setItem(0, 1, QTableWidgetItem(f"{score}%"))
         self.tracker_table.setItem(0, 2, QTableWidgetItem(str(len(trackers))))
+        self.tracker_table.setItem(0, 3, self.changes_item(added, removed))
         view_btn = QPushButton("View Report")
-        view_btn.clicked.connect(lambda: self.show_detailed_report(html, trackers))
-        self.tracker_table.setCellWidget(0, 3, view_btn)
+        view_btn.clicked.connect(lambda: self.show_detailed_report(scan_id, trackers))
+        self.tracker_table.setCellWidget(0, 4, view_btn)
+
+    def changes_item(self, added, removed):
+        if not added and not removed:
+            return QTableWidgetItem("No change")
+        item = QTableWidgetItem(f"+{len(added)} / -{len(removed)}")
+        item.setForeground(Qt.GlobalColor.red if added else Qt.GlobalColor.darkGreen)
+        item.setToolTip("\n".join([f"Added: {name}" for name in added] + [f"Removed: {name}" for name in removed]))
+        return item
+
+    def rescore_history(self, weights):
+        """Rescores this session's and the stored scans when the configured weights have changed."""
+        self.score_weights = weights
+        try:
+            changed = self.scan_db.rescore(weights.key(), lambda scans: score_batch(scans, weights))
+        except sqlite3.Error as e:
+            print(f"Could not rescore scan history: {e}")
+            changed = 0
+        if changed:
+            print(f"Rescored {changed} stored scan(s) with the configured weights")
+        scores = score_batch([scan["trackers"] for scan in self.scan_history], weights)
+        for scan, score in zip(self.scan_history, scores):
+            scan["score"] = int(score)
+
+    def populate_facet_filters(self):
+        for combo, facet, label in ((self.category_filter, "category", "All categories"),
+                                    (self.company_filter, "company", "All companies")):
+            selected = combo.currentData()
+            combo.clear()
+            combo.addItem(label, None)
+            for value, count in self.scan_db.facet_counts(facet):
+                combo.addItem(f"{value} ({count})", value)
+            combo.setCurrentIndex(max(combo.findData(selected), 0))
 
     def populate_reports_table(self):
-        self.reports_table.setRowCount(len(self.scan_history))
-        for i, scan in enumerate(self.scan_history):
+        text = self.report_search_input.text().strip()
+        category = self.category_filter.currentData()
+        company = self.company_filter.currentData()
+        if text or category or company:
+            scans = self.scan_db.search(text, category=category, company=company)
+        else:
+            scans = self.scan_history
+
+        self.reports_table.setRowCount(len(scans))
+        for i, scan in enumerate(scans):
             self.reports_table.setItem(i, 0, QTableWidgetItem(scan["url"]))
             self.reports_table.setItem(i, 1, QTableWidgetItem(f"{scan['score']}%"))
             self.reports_table.setItem(i, 2, QTableWidgetItem(str(len(scan["trackers"]))))
             btn = QPushButton("View Report")
-            btn.clicked.connect(lambda _, h=scan["html"], t=scan["trackers"]: self.show_detailed_report(h, t))
+            if not self.snapshots.has(scan["scan_id"]):
+                btn.setEnabled(False)
+                btn.setToolTip("The page source of this scan is no longer stored")
+            btn.clicked.connect(lambda _, s=scan["scan_id"], t=scan["trackers"]: self.show_detailed_report(s, t))
             self.reports_table.setCellWidget(i, 3, btn)
 
-    def show_detailed_report(self, html, trackers):
-        dialog = DetailedReportDialog(html, trackers)
+        stats = self.snapshots.stats()
+        if stats["snapshots"]:
+            self.snapshot_label.setText(
+                f"Page snapshots: {stats['snapshots']} pages, {stats['html_bytes'] / 1e6:.1f} MB of HTML stored in "
+                f"{stats['stored_bytes'] / 1e6:.1f} MB (deduplication {stats['dedup_ratio']}x, "
+                f"{stats['saved_bytes'] / 1e6:.1f} MB saved)")
+
+    def show_detailed_report(self, scan_id, trackers):
+        dialog = DetailedReportDialog(lambda: self.snapshots.get(scan_id), trackers, self.profiler, scan_id)
         dialog.exec()
 
     def export_reports(self):
@@ -324,7 +493,8 @@ class PrivacyLensApp(QWidget):
         if file_path:
             try:
                 with open(file_path, 'w') as file:
-                    json.dump(self.scan_history, file, indent=4)
+                    scans = [dict(scan, html=self.snapshots.get(scan["scan_id"])) for scan in self.scan_history]
+                    json.dump(scans, file, indent=4)
                 QMessageBox.information(self, "Export Successful", "Reports have been successfully exported.")
             except Exception as e:
                 QMessageBox.critical(self, "Export Failed", f"An error occurred while exporting reports: {e}")
@@ -339,7 +509,17 @@ class PrivacyLensApp(QWidget):
             self.setStyleSheet(self.dark_theme())
         else:
             self.setStyleSheet(self.light_theme())
-        # Save settings logic here
+        try:
+            self.config.set("ui.notifications", notifications_enabled)
+            self.config.set("ui.scan_interval", scan_interval)
+            self.config.set("ui.theme", theme)
+            self.config.set("ui.language", language)
+            self.config.set("scan.timeout", self.timeout_spinbox.value())
+            self.config.save()
+            self.fetcher.timeout = self.timeout_spinbox.value()
+        except (ConfigError, OSError) as e:
+            QMessageBox.critical(self, "Settings Not Saved", f"An error occurred while saving settings: {e}")
+            return
         QMessageBox.information(self, "Settings Saved", f"Notifications: {'Enabled' if notifications_enabled else 'Disabled'}\nScan Interval: {scan_interval} minutes\nTheme: {theme}\nLanguage: {language}")
 
     def light_theme(self):
@@ -406,6 +586,9 @@ class PrivacyLensApp(QWidget):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = PrivacyLensApp()
+    config = load_config()
+    TRACKERS.poll_interval = config["trackers.poll_interval"]
+    TRACKERS.start_watching()
+    window = PrivacyLensApp(config)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -1 +1,258 @@
- 
+import argparse
+import json
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG_FILE = os.path.join(ROOT_DIR, "config.json")
+ENV_PREFIX = "PRIVACYLENS_"
+
+# Layers in increasing order of precedence
+LAYERS = ("default", "file", "env", "cli")
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Option:
+    """A typed setting with its default value and allowed range or choices."""
+
+    def __init__(self, type, default, minimum=None, maximum=None, choices=None, help=""):
+        self.type = type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+        self.help = help
+
+    def coerce(self, key, value):
+        if isinstance(value, str) and self.type is not str:
+            value = self._parse(key, value)
+        if self.type is bool:
+            if not isinstance(value, bool):
+                raise ConfigError(f"{key}: expected true/false, got {value!r}")
+        elif self.type is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ConfigError(f"{key}: expected a number, got {value!r}")
+            value = float(value)
+        elif self.type is int:
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ConfigError(f"{key}: expected an integer, got {value!r}")
+        elif self.type is dict:
+            if not isinstance(value, dict) or not all(
+                    isinstance(v, (int, float)) and not isinstance(v, bool) for v in value.values()):
+                raise ConfigError(f"{key}: expected an object of numbers, got {value!r}")
+        elif not isinstance(value, str):
+            raise ConfigError(f"{key}: expected a string, got {value!r}")
+
+        if self.minimum is not None and value < self.minimum:
+            raise ConfigError(f"{key}: {value} is below the minimum of {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ConfigError(f"{key}: {value} is above the maximum of {self.maximum}")
+        if self.choices is not None and value not in self.choices:
+            raise ConfigError(f"{key}: {value!r} is not one of {', '.join(self.choices)}")
+        return value
+
+    def _parse(self, key, text):
+        if self.type is bool:
+            lowered = text.strip().lower()
+            if lowered in ("1", "true", "yes", "on"):
+                return True
+            if lowered in ("0", "false", "no", "off"):
+                return False
+            raise ConfigError(f"{key}: expected true/false, got {text!r}")
+        if self.type is dict:
+            try:
+                return json.loads(text)
+            except ValueError:
+                raise ConfigError(f"{key}: expected a JSON object, got {text!r}")
+        try:
+            return self.type(text)
+        except ValueError:
+            raise ConfigError(f"{key}: expected {self.type.__name__}, got {text!r}")
+
+
+# What Chrome skips loading for each resource-blocking profile: content
+# settings (2 = block) and URL patterns blocked through the DevTools
+# protocol. Chrome has no content setting for stylesheets or fonts.
+RESOURCE_PROFILES = {
+    "none": {"prefs": {}, "blocked_urls": []},
+    "media": {
+        "prefs": {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        },
+        "blocked_urls": [],
+    },
+    "lean": {
+        "prefs": {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        },
+        "blocked_urls": ["*.css", "*.css?*", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    },
+}
+
+OPTIONS = {
+    # Fetching and browser
+    "scan.timeout": Option(float, 10.0, 0.5, 300, help="HTTP request timeout in seconds"),
+    "fetch.retries": Option(int, 2, 0, 10, help="Extra attempts after a transient fetch failure"),
+    "fetch.backoff_base": Option(float, 0.5, 0, 60, help="Upper bound in seconds of the first jittered retry delay"),
+    "fetch.backoff_max": Option(float, 5.0, 0, 600, help="Upper bound in seconds of any retry delay"),
+    "fetch.breaker_threshold": Option(int, 5, 1, 1000,
+                                      help="Consecutive failures after which a host is not contacted"),
+    "fetch.breaker_reset": Option(float, 30.0, 0.1, 86400,
+                                  help="Seconds before a failing host is tried again"),
+    "scan.tiering": Option(str, "auto", choices=("auto", "static", "browser"),
+                           help="Server scans: static HTML first and a browser only when needed, or one tier"),
+    "scan.min_body_text": Option(int, 100, 0, 100000,
+                                 help="Visible characters below which a static page is treated as unrendered"),
+    "browser.headless": Option(bool, True, help="Run Chrome without a window"),
+    "browser.chromedriver_path": Option(str, os.path.join("backend", "chromedriver.exe"),
+                                        help="Path to chromedriver, relative to the working directory"),
+    "browser.page_load_timeout": Option(float, 30.0, 1, 600, help="Selenium page load timeout in seconds"),
+    "browser.resource_profile": Option(str, "none", choices=tuple(RESOURCE_PROFILES),
+                                       help="Resource types Chrome skips loading"),
+
+    # Backend concurrency and caching
+    "server.max_concurrent_scans": Option(int, 4, 1, 256, help="Browser scans running at once"),
+    "server.result_cache_size": Option(int, 256, 0, 1000000, help="Finished scans kept for reuse"),
+    "server.result_cache_ttl": Option(float, 0.0, 0, 86400,
+                                      help="Seconds a finished scan is reused; 0 disables the cache"),
+    "rate_limit.rate": Option(float, 0.5, 0.001, 1000, help="Sustained scans per second per domain"),
+    "rate_limit.burst": Option(int, 3, 1, 10000, help="Scans a domain may receive in a burst"),
+    "rate_limit.max_wait": Option(float, 10.0, 0, 600, help="Seconds a request may queue for a token"),
+    "rate_limit.max_domains": Option(int, 10000, 1, 10000000, help="Domains tracked before LRU eviction"),
+
+    # Two-stage scan pipeline
+    "pipeline.fetch_workers": Option(int, 8, 1, 512, help="Threads fetching pages"),
+    "pipeline.parse_workers": Option(int, 0, 0, 256, help="Processes parsing pages; 0 uses one per CPU"),
+    "pipeline.queue_size": Option(int, 32, 1, 100000, help="Fetched pages waiting to be parsed"),
+    "pipeline.max_batch_urls": Option(int, 500, 1, 100000, help="URLs accepted by one batch request"),
+
+    # Inline script and resource hint scanning
+    "content_scan.enabled": Option(bool, True, help="Scan inline scripts and <link> hints"),
+    "content_scan.max_script_bytes": Option(int, 256 * 1024, 0, 64 * 1024 * 1024,
+                                            help="Characters of each inline script that are scanned"),
+    "content_scan.max_page_bytes": Option(int, 2 * 1024 * 1024, 0, 256 * 1024 * 1024,
+                                          help="Characters of inline script scanned per page"),
+
+    # Tracker database and scoring
+    "trackers.poll_interval": Option(float, 2.0, 0.1, 3600, help="Seconds between tracker file checks"),
+    "trackers.index_file": Option(str, os.path.join("database", "tracker_database.idx"),
+                                  help="Shared index mapped by parse workers, relative to the repo root; "
+                                       "empty to compile per worker"),
+    "score.category_weights": Option(dict, {}, help="Per-category penalty overrides"),
+    "score.company_weights": Option(dict, {}, help="Per-company multiplier overrides"),
+
+    # Scan history
+    "database.path": Option(str, os.path.join("database", "scans.db"),
+                            help="SQLite scan history of the desktop app, relative to the repo root"),
+    "database.server_path": Option(str, os.path.join("database", "server_scans.db"),
+                                   help="SQLite scan history of the server, relative to the repo root"),
+    "snapshots.path": Option(str, os.path.join("database", "snapshots.db"),
+                             help="Deduplicated page snapshots of the desktop app, relative to the repo root"),
+    "snapshots.max_mb": Option(int, 256, 1, 1024 * 1024, help="Compressed snapshot storage kept before LRU eviction"),
+    "snapshots.max_age_days": Option(int, 90, 0, 36500, help="Days a snapshot is kept; 0 keeps it until evicted"),
+
+    # Profiling of slow scans
+    "profiling.enabled": Option(bool, False, help="Sample scans and keep profiles of slow ones"),
+    "profiling.threshold_ms": Option(float, 2000.0, 0, 3600000, help="Latency above which a profile is saved"),
+    "profiling.interval_ms": Option(float, 20.0, 1, 10000, help="Milliseconds between stack samples"),
+    "profiling.max_profiles": Option(int, 200, 1, 100000, help="Saved profiles kept, slowest first"),
+    "profiling.dir": Option(str, "profiles", help="Directory of saved profiles, relative to the repo root"),
+
+    # Desktop app
+    "ui.notifications": Option(bool, False),
+    "ui.scan_interval": Option(int, 10, 1, 60, help="Minutes between scheduled scans"),
+    "ui.theme": Option(str, "Light", choices=("Light", "Dark")),
+    "ui.language": Option(str, "English", choices=("English", "Spanish", "French", "German", "Chinese")),
+}
+
+
+def env_name(key):
+    return ENV_PREFIX + key.upper().replace(".", "_")
+
+
+class Config:
+    """Settings resolved from defaults, a JSON file, environment and command line.
+
+    Later layers win. set() and save() only touch the file layer, so values
+    pinned through the environment or command line keep precedence.
+    """
+
+    def __init__(self, path=DEFAULT_CONFIG_FILE, env=None, cli=None):
+        self.path = path
+        self._layers = {layer: {} for layer in LAYERS}
+        self._layers["default"] = {key: option.default for key, option in OPTIONS.items()}
+        self._layers["file"] = self._read_file(path)
+        self._layers["env"] = self._read_env(os.environ if env is None else env)
+        self._layers["cli"] = self._validate(cli or {}, "command line")
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def get(self, key):
+        if key not in OPTIONS:
+            raise KeyError(key)
+        for layer in reversed(LAYERS):
+            if key in self._layers[layer]:
+                return self._layers[layer][key]
+
+    def source(self, key):
+        for layer in reversed(LAYERS):
+            if key in self._layers[layer]:
+                return layer
+
+    def set(self, key, value):
+        if key not in OPTIONS:
+            raise ConfigError(f"Unknown setting: {key}")
+        self._layers["file"][key] = OPTIONS[key].coerce(key, value)
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump(self._layers["file"], file, indent=4, sort_keys=True)
+
+    def as_dict(self):
+        return {key: self.get(key) for key in OPTIONS}
+
+    def _read_file(self, path):
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path) as file:
+            try:
+                values = json.load(file)
+            except ValueError as e:
+                raise ConfigError(f"{path}: {e}")
+        if not isinstance(values, dict):
+            raise ConfigError(f"{path}: expected a JSON object")
+        return self._validate(values, path)
+
+    def _read_env(self, env):
+        return self._validate({key: env[env_name(key)] for key in OPTIONS if env_name(key) in env}, "environment")
+
+    @staticmethod
+    def _validate(values, origin):
+        validated = {}
+        for key, value in values.items():
+            if key not in OPTIONS:
+                raise ConfigError(f"{origin}: unknown setting {key}")
+            validated[key] = OPTIONS[key].coerce(key, value)
+        return validated
+
+
+def load_config(argv=None):
+    """Builds a Config from --config/--set arguments, ignoring any other arguments."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--config", default=os.environ.get(ENV_PREFIX + "CONFIG", DEFAULT_CONFIG_FILE))
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE")
+    args, _ = parser.parse_known_args(argv)
+
+    cli = {}
+    for item in args.set:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ConfigError(f"--set expects KEY=VALUE, got {item!r}")
+        cli[key.strip()] = value
+    return Config(args.config, cli=cli)
+
@@ -0,0 +1,128 @@
+import re
+
+from utils.tracker_db import trie_pattern
+
+# Inline bootstrap snippets that load a tracker even when its script is
+# served from a first-party path: (anchor, tail regex, tracker URL, name,
+# category, company). The anchor is a literal that must not be a prefix of
+# another anchor, and the tail regex has to match right after it. The
+# tracker URL is one the snippet loads or reports to; when it matches the
+# tracker database, that entry is reported instead of the name given here,
+# so a snippet and its <script src> or <noscript> pixel count as one tracker.
+INLINE_SIGNATURES = (
+    ("gtag", r"\s*\(", "https://www.google-analytics.com/g/collect",
+     "Google Analytics (gtag)", "Analytics", "Google"),
+    ("GoogleAnalyticsObject", None, "https://www.google-analytics.com/analytics.js",
+     "Google Analytics", "Analytics", "Google"),
+    ("gtm.start", None, "https://www.googletagmanager.com/gtm.js",
+     "Google Tag Manager", "Tag Management", "Google"),
+    ("fbq", r"\s*\(", "https://connect.facebook.net/en_US/fbevents.js",
+     "Facebook Pixel", "Advertising", "Meta"),
+    ("_hsq", r"\b", "https://js.hs-analytics.net/analytics.js",
+     "HubSpot", "Analytics", "HubSpot"),
+    ("_paq", r"\b", "https://cdn.matomo.cloud/matomo.js",
+     "Matomo", "Analytics", "Matomo"),
+    ("ttq.", r"(?:load|page|track)\b", "https://analytics.tiktok.com/i18n/pixel/events.js",
+     "TikTok Pixel", "Advertising", "TikTok"),
+    ("snaptr", r"\s*\(", "https://tr.snapchat.com/p",
+     "Snap Pixel", "Advertising", "Snapchat"),
+    ("twq", r"\s*\(", "https://static.ads-twitter.com/uwt.js",
+     "Twitter Pixel", "Advertising", "Twitter"),
+    ("_linkedin_partner_id", r"\b", "https://px.ads.linkedin.com/collect",
+     "LinkedIn Insight Tag", "Social Media", "LinkedIn"),
+    ("_hjSettings", r"\b", "https://static.hotjar.com/c/hotjar.js",
+     "Hotjar", "Analytics", "Hotjar"),
+    ("mixpanel.init", r"\s*\(", "https://cdn.mxpnl.com/libs/mixpanel-2-latest.min.js",
+     "Mixpanel", "Analytics", "Mixpanel"),
+    ("analytics.load", r"\s*\(", "https://cdn.segment.com/analytics.js",
+     "Segment", "Analytics", "Segment"),
+    ("clarity", r"\s*\(\s*['\"]", "https://www.clarity.ms/tag/",
+     "Microsoft Clarity", "Analytics", "Microsoft"),
+    ("uetq", r"\b", "https://bat.bing.com/bat.js",
+     "Microsoft Advertising", "Advertising", "Microsoft"),
+    ("pintrk", r"\s*\(", "https://ct.pinterest.com/v3/",
+     "Pinterest Tag", "Advertising", "Pinterest"),
+    ("rdt", r"\s*\(\s*['\"]init", "https://www.redditstatic.com/ads/pixel.js",
+     "Reddit Pixel", "Advertising", "Reddit"),
+    ("_satellite", r"\b", "https://assets.adobedtm.com/launch.js",
+     "Adobe Launch", "Tag Management", "Adobe"),
+    ("amplitude.", r"(?:getInstance|init)\b", "https://cdn.amplitude.com/libs/amplitude.js",
+     "Amplitude", "Analytics", "Amplitude"),
+    ("heap.load", r"\s*\(", "https://cdn.heapanalytics.com/js/heap.js",
+     "Heap", "Analytics", "Heap"),
+    ("_fs_org", r"\b", "https://edge.fullstory.com/s/fs.js",
+     "FullStory", "Analytics", "FullStory"),
+    ("Intercom", r"\s*\(\s*['\"]boot", "https://widget.intercom.io/widget/",
+     "Intercom", "Customer Support", "Intercom"),
+)
+
+# <link rel> values that make the browser contact a host ahead of use
+HINT_RELS = {"preconnect", "dns-prefetch", "preload", "prefetch", "modulepreload"}
+
+
+class ContentScanner:
+    """Finds tracker bootstraps in inline scripts with a single compiled pass.
+
+    One prefix-factored regex finds every signature anchor; only anchor hits
+    are checked against the signature's tail. Each script is truncated to
+    max_script_bytes and scanning stops once max_page_bytes of inline text
+    has been read, so a page full of large bundles has a bounded cost.
+    """
+
+    def __init__(self, signatures=INLINE_SIGNATURES, max_script_bytes=256 * 1024, max_page_bytes=2 * 1024 * 1024):
+        self.signatures = signatures
+        self.max_script_bytes = max_script_bytes
+        self.max_page_bytes = max_page_bytes
+        self._anchors = {}
+        for index, (anchor, tail, *_) in enumerate(signatures):
+            self._anchors[anchor] = (index, re.compile(tail) if tail else None)
+        self._regex = re.compile(trie_pattern(self._anchors))
+
+    @classmethod
+    def from_config(cls, config):
+        """Returns a scanner built from the content_scan.* settings, or None if disabled."""
+        if not config["content_scan.enabled"]:
+            return None
+        return cls(max_script_bytes=config["content_scan.max_script_bytes"],
+                   max_page_bytes=config["content_scan.max_page_bytes"])
+
+    def scan_text(self, text, found=None):
+        """Adds the indexes of signatures matched in text to found and returns it."""
+        found = set() if found is None else found
+        for match in self._regex.finditer(text):
+            index, tail = self._anchors[match.group(0)]
+            if index in found:
+                continue
+            # Skip anchors that are the tail end of a longer identifier
+            start = match.start()
+            if start and (text[start - 1].isalnum() or text[start - 1] in "_$"):
+                continue
+            if tail is None or tail.match(text, match.end()):
+                found.add(index)
+                if len(found) == len(self.signatures):
+                    break
+        return found
+
+    def scan_scripts(self, texts, matcher=None):
+        """Scans inline script bodies, returning one tracker dict per signature found.
+
+        With a matcher, signatures whose tracker URL it matches are reported
+        as that database entry.
+        """
+        found = set()
+        budget = self.max_page_bytes
+        for text in texts:
+            if budget <= 0:
+                break
+            text = text[:min(self.max_script_bytes, budget)]
+            budget -= len(text)
+            self.scan_text(text, found)
+
+        trackers = []
+        for index in sorted(found):
+            _, _, url, name, category, company = self.signatures[index]
+            entry = matcher.match(url) if matcher is not None else None
+            if entry is not None:
+                name, category, company = entry["name"], entry["category"], entry["company"]
+            trackers.append({"name": name, "category": category, "company": company})
+        return trackers
@@ -0,0 +1,274 @@
+import random
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+
+from utils.metrics import Counters
+
+FAILURE_KINDS = ("invalid_url", "dns", "connect", "tls", "timeout", "http_status", "bad_response", "circuit_open")
+
+# Upstream statuses worth another attempt; other 4xx mean the page itself is unavailable
+TRANSIENT_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+# Chrome network error codes reported by Selenium, checked in order
+BROWSER_ERRORS = (
+    ("ERR_NAME_NOT_RESOLVED", "dns"),
+    ("ERR_NAME_RESOLUTION_FAILED", "dns"),
+    ("ERR_CERT_", "tls"),
+    ("ERR_SSL_", "tls"),
+    ("ERR_TIMED_OUT", "timeout"),
+    ("ERR_CONNECTION_TIMED_OUT", "timeout"),
+    ("ERR_CONNECTION_", "connect"),
+    ("ERR_ADDRESS_UNREACHABLE", "connect"),
+    ("ERR_INTERNET_DISCONNECTED", "connect"),
+)
+
+
+class FetchError(Exception):
+    """A classified fetch failure: one of FAILURE_KINDS, plus the upstream status for http_status."""
+
+    def __init__(self, kind, url, message, status=None, transient=False, retry_after=None):
+        super().__init__(message)
+        self.kind = kind
+        self.url = url
+        self.status = status
+        self.transient = transient
+        self.retry_after = retry_after
+
+    def to_dict(self):
+        failure = {"error": str(self), "failure": self.kind}
+        if self.status is not None:
+            failure["status"] = self.status
+        return failure
+
+
+def host_of(url):
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def check_url(url):
+    """Raises FetchError("invalid_url") unless url is an http(s) URL with a host."""
+    try:
+        parts = urlsplit(url)
+        # Reading the port validates it
+        parts.port
+    except ValueError as e:
+        raise FetchError("invalid_url", url, f"Invalid URL {url!r}: {e}") from None
+    if parts.scheme.lower() not in ("http", "https"):
+        raise FetchError("invalid_url", url, f"Invalid URL {url!r}: only http and https are supported")
+    if not parts.hostname:
+        raise FetchError("invalid_url", url, f"Invalid URL {url!r}: no host")
+
+
+def status_error(url, status):
+    """The FetchError for an upstream answer with HTTP status."""
+    return FetchError("http_status", url, f"{host_of(url)} answered HTTP {status}", status=status,
+                      transient=status in TRANSIENT_STATUSES)
+
+
+def _causes(error):
+    """Yields error and the exceptions it wraps, including urllib3's reason chains."""
+    seen = set()
+    while isinstance(error, BaseException) and id(error) not in seen:
+        yield error
+        seen.add(id(error))
+        wrapped = error.args[0] if error.args else None
+        error = error.__cause__ or error.__context__ or getattr(error, "reason", None) or wrapped
+
+
+def _caused_by(error, types):
+    return any(isinstance(cause, types) for cause in _causes(error))
+
+
+def classify(error, url):
+    """Maps a requests or Selenium exception to a FetchError, or returns None if it is not a fetch failure."""
+    if isinstance(error, FetchError):
+        return error
+    host = host_of(url)
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return status_error(url, error.response.status_code)
+    if isinstance(error, requests.exceptions.SSLError) or _caused_by(error, ssl.SSLError):
+        return FetchError("tls", url, f"TLS handshake with {host} failed: {error}")
+    if isinstance(error, requests.Timeout) or _caused_by(error, socket.timeout):
+        return FetchError("timeout", url, f"{host} did not respond in time", transient=True)
+    if isinstance(error, requests.ConnectionError):
+        if _caused_by(error, socket.gaierror) or "NameResolutionError" in str(error):
+            return FetchError("dns", url, f"Could not resolve {host}")
+        return FetchError("connect", url, f"Could not connect to {host}: {error}", transient=True)
+    if isinstance(error, (requests.exceptions.InvalidURL, requests.exceptions.MissingSchema,
+                          requests.exceptions.InvalidSchema, requests.exceptions.URLRequired)):
+        return FetchError("invalid_url", url, f"Invalid URL {url!r}: {error}")
+    if isinstance(error, requests.RequestException):
+        # Too many redirects, broken chunked or compressed bodies and the like
+        return FetchError("bad_response", url, f"Unusable response from {host}: {error}")
+
+    # Selenium reports navigation failures as WebDriverException messages
+    message = str(error)
+    if type(error).__name__ == "InvalidArgumentException":
+        return FetchError("invalid_url", url, f"Browser could not load {url!r}: invalid URL")
+    if type(error).__name__ == "TimeoutException":
+        return FetchError("timeout", url, f"{host} did not finish loading in time", transient=True)
+    if type(error).__name__ == "WebDriverException" or "net::ERR_" in message:
+        for marker, kind in BROWSER_ERRORS:
+            if marker in message:
+                return FetchError(kind, url, f"Browser could not load {host}: {marker.rstrip('_')}",
+                                  transient=kind in ("timeout", "connect"))
+    return None
+
+
+class _Circuit:
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+
+    After failure_threshold consecutive host failures the circuit opens and
+    calls fail immediately. Once reset_timeout has passed a single trial
+    call is let through; its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, max_hosts=10000, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_hosts = max_hosts
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._circuits = OrderedDict()
+
+    def before_call(self, url):
+        """Raises FetchError("circuit_open") unless a call to url's host may proceed."""
+        host = host_of(url)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return
+            remaining = circuit.opened_at + self.reset_timeout - self._clock()
+            if remaining <= 0 and not circuit.trial_running:
+                circuit.trial_running = True
+                return
+        raise FetchError("circuit_open", url, f"Too many recent failures for {host}, not trying again yet",
+                         retry_after=max(remaining, 1.0))
+
+    def record_success(self, url):
+        with self._lock:
+            self._circuits.pop(host_of(url), None)
+
+    def release(self, url):
+        """Ends a trial call that never reached the host, leaving the circuit as it was."""
+        with self._lock:
+            circuit = self._circuits.get(host_of(url))
+            if circuit is not None:
+                circuit.trial_running = False
+
+    def record_failure(self, url):
+        host = host_of(url)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = self._circuits[host] = _Circuit()
+                if len(self._circuits) > self.max_hosts:
+                    self._circuits.popitem(last=False)
+            self._circuits.move_to_end(host)
+            circuit.failures += 1
+            if circuit.trial_running or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = self._clock()
+            circuit.trial_running = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracked_hosts": len(self._circuits),
+                "open": sum(1 for circuit in self._circuits.values() if circuit.opened_at is not None),
+            }
+
+
+class Fetcher:
+    """Runs fetch calls with failure classification, jittered retries and a circuit breaker."""
+
+    def __init__(self, timeout=10.0, retries=2, backoff_base=0.5, backoff_max=5.0, breaker=None, sleep=time.sleep):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self.counters = Counters("attempts", "retries", "succeeded", *(f"failed_{kind}" for kind in FAILURE_KINDS))
+
+    @classmethod
+    def from_config(cls, config):
+        breaker = CircuitBreaker(config["fetch.breaker_threshold"], config["fetch.breaker_reset"])
+        return cls(config["scan.timeout"], config["fetch.retries"], config["fetch.backoff_base"],
+                   config["fetch.backoff_max"], breaker)
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff before retry number attempt (starting at 0)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def run(self, url, fn):
+        """Calls fn() for url, retrying transient failures; raises FetchError when it gives up.
+
+        Exceptions that are not fetch failures propagate unchanged and do
+        not count against the host.
+        """
+        try:
+            check_url(url)
+        except FetchError:
+            self.counters.incr("failed_invalid_url")
+            raise
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call(url)
+            except FetchError:
+                self.counters.incr("failed_circuit_open")
+                raise
+            self.counters.incr("attempts")
+            try:
+                result = fn()
+            except Exception as e:
+                failure = classify(e, url)
+                if failure is None:
+                    self.breaker.release(url)
+                    raise
+                # 4xx answers come from a healthy host; an invalid URL never reached one
+                if failure.kind == "invalid_url":
+                    self.breaker.release(url)
+                elif failure.kind != "http_status" or failure.transient:
+                    self.breaker.record_failure(url)
+                else:
+                    self.breaker.record_success(url)
+                if not failure.transient or attempt >= self.retries:
+                    self.counters.incr(f"failed_{failure.kind}")
+                    if failure is e:
+                        raise
+                    raise failure from e
+                self.counters.incr("retries")
+                self._sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            self.breaker.record_success(url)
+            self.counters.incr("succeeded")
+            return result
+
+    def get(self, url):
+        """Downloads url with requests, returning the response of the first successful attempt."""
+        def attempt():
+            response = requests.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response
+        return self.run(url, attempt)
+
+    def stats(self):
+        return {**self.counters.snapshot(), "circuits": self.breaker.stats()}
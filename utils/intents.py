@@ -0,0 +1,217 @@
+import re
+import time
+from datetime import datetime
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9.\-_]*")
+
+# Relative periods understood in questions, as (token, seconds back, label)
+PERIODS = (
+    ("today", None, "today"),
+    ("week", 7 * 86400, "in the last 7 days"),
+    ("month", 30 * 86400, "in the last 30 days"),
+    ("year", 365 * 86400, "in the last year"),
+)
+
+
+def tokenize(text):
+    return [token.rstrip(".-_") for token in TOKEN.findall(text.lower())]
+
+
+class Question:
+    """A tokenized message with the entity, URL and period found in it."""
+
+    def __init__(self, text, tokens, entity=None, url=None, since=None, period=""):
+        self.text = text
+        self.tokens = tokens
+        self.entity = entity
+        self.url = url
+        self.since = since
+        self.period = period
+
+
+class EntityIndex:
+    """Finds known tracker and company names in token lists, longest name first.
+
+    Build it once and reuse it across messages; entities are indexed in
+    sorted order, so names of equal length always resolve the same way.
+    """
+
+    def __init__(self, entities):
+        self._index = {}
+        for facet, value in sorted(entities):
+            tokens = tuple(tokenize(value))
+            if tokens:
+                self._index.setdefault(tokens[0], []).append((tokens, facet, value))
+        for candidates in self._index.values():
+            candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+
+    def find(self, tokens):
+        best = None
+        for start, token in enumerate(tokens):
+            for names, facet, value in self._index.get(token, ()):
+                if tuple(tokens[start:start + len(names)]) == names:
+                    if best is None or len(names) > best[0]:
+                        best = (len(names), facet, value)
+                    break
+        return best[1:] if best else None
+
+
+class Intent:
+    """Keywords with weights, an optional requirement ("entity" or "url") and a handler yielding answer lines."""
+
+    def __init__(self, name, keywords, handler, requires=None):
+        self.name = name
+        self.keywords = keywords
+        self.handler = handler
+        self.requires = requires
+
+
+class IntentEngine:
+    """Picks the intent whose keywords best cover a message.
+
+    Keywords are compiled once into a token index, so scoring a message
+    costs one dictionary lookup per token however many intents exist.
+    """
+
+    def __init__(self, intents, fallback):
+        self.intents = intents
+        self.fallback = fallback
+        self._index = {}
+        for position, intent in enumerate(intents):
+            for token, weight in intent.keywords.items():
+                self._index.setdefault(token, []).append((position, weight))
+
+    def parse(self, text, entities=()):
+        """Reads a message into a Question; entities is an EntityIndex or (facet, value) pairs to index."""
+        tokens = tokenize(text)
+        question = Question(text, tokens)
+        if not isinstance(entities, EntityIndex):
+            entities = EntityIndex(entities)
+        question.entity = entities.find(tokens)
+        question.url = next((token for token in tokens if "." in token.strip(".")), None)
+        for token, seconds, label in PERIODS:
+            if token in tokens:
+                if seconds is None:
+                    question.since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+                else:
+                    question.since = time.time() - seconds
+                question.period = label
+                break
+        return question
+
+    def classify(self, question):
+        scores = [0.0] * len(self.intents)
+        for token in set(question.tokens):
+            for position, weight in self._index.get(token, ()):
+                scores[position] += weight
+        best = None
+        for position, intent in enumerate(self.intents):
+            if intent.requires == "entity" and question.entity is None:
+                continue
+            if intent.requires == "url" and question.url is None:
+                continue
+            if scores[position] > 0 and (best is None or scores[position] > scores[best]):
+                best = position
+        return self.intents[best] if best is not None else self.fallback
+
+    def respond(self, text, db, entities=()):
+        """Yields the lines of the answer to text."""
+        question = self.parse(text, entities)
+        yield from self.classify(question).handler(question, db)
+
+
+def _reply(text):
+    return lambda question, db: iter([text])
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def _sites_using(question, db):
+    facet, value = question.entity
+    pages = db.pages_with(facet, value)
+    if not pages:
+        yield f"None of your scanned sites use {value}."
+        return
+    yield f"{len(pages)}{'+' if len(pages) == 50 else ''} scanned site(s) use {value}:"
+    for url, last_seen in pages:
+        yield f"  {url} (last scanned {_format_time(last_seen)})"
+
+
+def _ranked(best):
+    def answer(question, db):
+        scans = db.ranked_scans(question.since, limit=5, best=best)
+        period = f" {question.period}" if question.period else ""
+        if not scans:
+            yield f"You have no scans{period} yet."
+            return
+        yield f"Your {'best' if best else 'worst'} scores{period}:"
+        for scan in scans:
+            yield f"  {scan['score']}% {scan['url']} ({len(scan['trackers'])} trackers, {_format_time(scan['timestamp'])})"
+    return answer
+
+
+def _changes(question, db):
+    changes = db.changes(question.url, limit=5)
+    if not changes:
+        yield f"No tracker changes recorded for {question.url}."
+        return
+    yield f"Tracker changes on {question.url}:"
+    for change in changes:
+        parts = [f"+{name}" for name in change["added"]] + [f"-{name}" for name in change["removed"]]
+        yield f"  {_format_time(change['timestamp'])}: {', '.join(parts)}"
+
+
+def _most_common(question, db):
+    facet = "company" if {"company", "companies"} & set(question.tokens) else "tracker"
+    counts = db.facet_counts(facet, limit=10)
+    if not counts:
+        yield "You have not scanned any sites with trackers yet."
+        return
+    yield f"Most common {'companies' if facet == 'company' else 'trackers'} in your scans:"
+    for value, scans in counts:
+        yield f"  {value}: {scans} scan(s)"
+
+
+def _scan_count(question, db):
+    period = f" {question.period}" if question.period else ""
+    yield f"You have made {db.scan_count(question.since)} scan(s){period}."
+
+
+def _about(question, db):
+    facet, value = question.entity
+    pages = db.pages_with(facet, value, limit=1000)
+    kind = "company" if facet == "company" else "tracker"
+    yield f"{value} is a {kind} seen on {len(pages)} of your scanned site(s)."
+
+
+def default_intents():
+    """Returns (intents, fallback) answering help and scan history questions."""
+    intents = [
+        Intent("greeting", {"hello": 1, "hi": 1, "hey": 1}, _reply("Hello! How can I assist you today?")),
+        Intent("scan_help", {"scan": 1, "how": 0.25},
+               _reply("To scan a website, please go to the dashboard and enter the URL.")),
+        Intent("report_help", {"report": 1, "reports": 1},
+               _reply("You can view previous scan reports in the Reports section.")),
+        Intent("settings_help", {"settings": 1, "setting": 1},
+               _reply("You can change the settings in the Settings section.")),
+        Intent("export_help", {"export": 1.5},
+               _reply("You can export the reports by clicking the Export Reports button in the Reports section.")),
+        Intent("sites_using", {"use": 1.5, "uses": 1.5, "using": 1.5, "sites": 1, "site": 1, "which": 0.5,
+                               "who": 0.5, "where": 1, "with": 0.5, "found": 0.5, "have": 0.5, "has": 0.5},
+               _sites_using, requires="entity"),
+        Intent("about", {"what": 0.75, "about": 1, "tell": 0.75, "is": 0.5}, _about, requires="entity"),
+        Intent("worst_scores", {"worst": 2, "lowest": 2, "bad": 1.5, "score": 0.5, "scores": 0.5},
+               _ranked(best=False)),
+        Intent("best_scores", {"best": 2, "highest": 2, "safest": 2, "good": 1.5, "score": 0.5, "scores": 0.5},
+               _ranked(best=True)),
+        Intent("changes", {"changed": 2, "change": 2, "changes": 2, "added": 1, "removed": 1, "new": 0.5},
+               _changes, requires="url"),
+        Intent("most_common", {"common": 2, "top": 1.5, "frequent": 2, "popular": 2, "most": 1},
+               _most_common),
+        Intent("scan_count", {"many": 1.5, "count": 1.5, "number": 1, "scans": 0.5, "scanned": 0.5},
+               _scan_count),
+    ]
+    fallback = Intent("fallback", {}, _reply("I'm sorry, I didn't understand that. Can you please rephrase?"))
+    return intents, fallback
@@ -0,0 +1,119 @@
+import html
+
+from utils.content_scanner import HINT_RELS
+
+# Loaders that inject more tags at runtime, so static HTML shows only part of the picture
+TAG_MANAGER_LOADERS = (
+    "googletagmanager.com/gtm.js",
+    "tags.tiqcdn.com",
+    "assets.adobedtm.com",
+    "cdn.segment.com/analytics.js",
+    "cdn.tagcommander.com",
+    "nexus.ensighten.com",
+)
+# Mount points of client-rendered apps
+SPA_ROOT_IDS = ("root", "app", "__next", "__nuxt", "___gatsby", "svelte", "q-app")
+# Pages asking for JavaScript in <noscript> are only shells when the rest of their
+# body text is shorter than this many times min_body_text
+NOSCRIPT_SHELL_TEXT = 3
+
+
+def _hit(tracker, url, source):
+    return {
+        "name": tracker["name"],
+        "category": tracker["category"],
+        "company": tracker["company"],
+        "url": url,
+        "source": source,
+    }
+
+
+def find_trackers(soup, matcher, content_scanner=None, src_tags=("script", "iframe", "img"), report=None):
+    """Matches a parsed page against the tracker database.
+
+    Looks at src/data-src of src_tags and, when a content scanner is given,
+    also at <link> resource hints and inline script bodies. report, if
+    given, is called with the new hits after each of these passes.
+    """
+    trackers = []
+    for tag in soup.find_all(list(src_tags)):
+        src = tag.get("src") or tag.get("data-src")
+        if src:
+            tracker = matcher.match(src)
+            if tracker:
+                trackers.append(_hit(tracker, src, "src"))
+    reported = _report(report, trackers, 0)
+
+    if content_scanner is None:
+        return trackers
+
+    for link in soup.find_all("link", href=True):
+        rels = link.get("rel") or []
+        if isinstance(rels, str):
+            rels = rels.split()
+        if any(rel.lower() in HINT_RELS for rel in rels):
+            tracker = matcher.match(link["href"])
+            if tracker:
+                trackers.append(_hit(tracker, link["href"], "link"))
+    reported = _report(report, trackers, reported)
+
+    inline_scripts = (script.string or "" for script in soup.find_all("script", src=False))
+    for tracker in content_scanner.scan_scripts(inline_scripts, matcher):
+        trackers.append(_hit(tracker, None, "inline"))
+    _report(report, trackers, reported)
+    return trackers
+
+
+def _report(report, trackers, reported):
+    """Passes the hits after the first reported to report; returns how many have been reported."""
+    if report is not None and len(trackers) > reported:
+        report(trackers[reported:])
+    return len(trackers)
+
+
+def browser_reason(soup, min_body_text=100):
+    """Returns why a page's static HTML may hide trackers a browser would load, or None.
+
+    Reasons are "tag_manager", "spa_shell" and "empty_body".
+    """
+    for script in soup.find_all("script"):
+        src = script.get("src") or ""
+        if any(loader in src for loader in TAG_MANAGER_LOADERS):
+            return "tag_manager"
+        if not src and "gtm.start" in (script.string or ""):
+            return "tag_manager"
+
+    for root_id in SPA_ROOT_IDS:
+        root = soup.find(id=root_id)
+        if root is not None and len(root.get_text(strip=True)) < min_body_text:
+            return "spa_shell"
+
+    body = soup.body
+    body_text = len(body.get_text(" ", strip=True)) if body is not None else 0
+    asks_for_javascript = False
+    for noscript in (body or soup).find_all("noscript"):
+        text = noscript.get_text(" ", strip=True)
+        body_text -= len(text)
+        asks_for_javascript = asks_for_javascript or "javascript" in text.lower()
+    # Server-rendered pages often ask for JavaScript too, but carry their content anyway
+    if asks_for_javascript and body_text < NOSCRIPT_SHELL_TEXT * min_body_text:
+        return "spa_shell"
+    if body_text < min_body_text:
+        return "empty_body"
+    return None
+
+
+def render_report_html(original_html, trackers, only_tracker_lines=False):
+    """Builds the report view's HTML: escaped page source with tracker names highlighted."""
+    escaped_html = html.escape(original_html)
+    if only_tracker_lines:
+        lines = escaped_html.split('\n')
+        tracker_lines = [line for line in lines if any(html.escape(t['name']) in line for t in trackers)]
+        escaped_html = '\n'.join(tracker_lines)
+
+    for tracker in trackers:
+        name = html.escape(tracker["name"])
+        highlight = f'<a href="#" style="text-decoration:none; background-color: yellow; border: 1px dashed orange; color: black;" title="Click for tracker info">{name}</a>'
+        escaped_html = escaped_html.replace(name, highlight)
+
+    return f"<pre style='font-family: monospace;'>{escaped_html}</pre>"
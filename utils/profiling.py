@@ -0,0 +1,220 @@
+"""Opt-in sampling profiler for slow scans.
+
+While a session is open its thread's stack is sampled at a fixed interval.
+Sessions that take longer than the latency threshold are written as
+collapsed stacks ("root;caller;leaf count" per line, the input format of
+flamegraph.pl and speedscope) under the scan ID and listed in index.jsonl.
+Stacks sampled in another process, such as a parse worker, can be added to
+the session that waited for it with add_stacks.
+
+Show the slowest recorded sessions with:
+    python -m utils.profiling [profile directory]
+"""
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+INDEX_FILE = "index.jsonl"
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame):
+    """Returns the stack of frame as a root-first, semicolon separated string."""
+    names = []
+    while frame is not None:
+        names.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Session:
+    """One profiled call; set key to the scan ID once it is known."""
+
+    def __init__(self, profiler, label, key):
+        self.profiler = profiler
+        self.label = label
+        self.key = key
+        # Several sessions can profile the same scan, e.g. requests sharing it
+        self.number = next(profiler._numbers)
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.seconds = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.profiler._register(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.started
+        self.profiler._unregister(self)
+        if self.seconds >= self.profiler.threshold:
+            self.profiler._save(self)
+        return False
+
+
+class _Disabled:
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Profiler:
+    """Samples the stacks of open sessions from one background thread.
+
+    Sampling only reads frames and does nothing while no session is open,
+    so it can stay enabled in production with a coarse interval.
+    """
+
+    def __init__(self, directory, threshold=2.0, interval=0.02, max_profiles=200, enabled=True):
+        self.directory = directory
+        self.threshold = threshold
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._numbers = itertools.count(1)
+        self._wake = threading.Event()
+        self._sampler = None
+
+    @classmethod
+    def from_config(cls, config, root_dir):
+        return cls(os.path.join(root_dir, config["profiling.dir"]), config["profiling.threshold_ms"] / 1000,
+                   config["profiling.interval_ms"] / 1000, config["profiling.max_profiles"],
+                   config["profiling.enabled"])
+
+    def session(self, label, key=None):
+        """Context manager profiling the calling thread until it exits."""
+        if not self.enabled:
+            return _Disabled(key)
+        return Session(self, label, key)
+
+    def add_stacks(self, stacks, root):
+        """Adds stacks sampled elsewhere to the calling thread's open session, under the frame root."""
+        if not stacks:
+            return
+        thread_id = threading.get_ident()
+        with self._lock:
+            sessions = [session for session in self._sessions.values() if session.thread_id == thread_id]
+        for session in sessions:
+            for stack, count in stacks.items():
+                session.stacks[f"{root};{stack}"] += count
+
+    def worst(self, n=10):
+        """Returns the n slowest recorded sessions, slowest first."""
+        return sorted(self._read_index(), key=lambda entry: entry["seconds"], reverse=True)[:n]
+
+    def _register(self, session):
+        with self._lock:
+            self._sessions[id(session)] = session
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+                self._sampler.start()
+        self._wake.set()
+
+    def _unregister(self, session):
+        with self._lock:
+            self._sessions.pop(id(session), None)
+
+    def _sample(self):
+        while True:
+            with self._lock:
+                sessions = list(self._sessions.values())
+                if not sessions:
+                    self._wake.clear()
+            if not sessions:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for session in sessions:
+                frame = frames.get(session.thread_id)
+                if frame is not None:
+                    session.stacks[collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _save(self, session):
+        stamp = time.time()
+        name = f"scan-{session.key}" if session.key is not None else f"run-{int(stamp * 1000)}"
+        path = os.path.join(self.directory, f"{name}-{session.label}-{session.number}.folded")
+        entry = {
+            "label": session.label,
+            "key": session.key,
+            "seconds": round(session.seconds, 4),
+            "samples": sum(session.stacks.values()),
+            "timestamp": stamp,
+            "path": os.path.basename(path),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "w") as file:
+                for stack, count in session.stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+            with self._lock:
+                entries = [item for item in self._read_index() if item["path"] != entry["path"]] + [entry]
+                if len(entries) > self.max_profiles:
+                    # Keep the slowest profiles
+                    entries.sort(key=lambda item: item["seconds"], reverse=True)
+                    for dropped in entries[self.max_profiles:]:
+                        try:
+                            os.remove(os.path.join(self.directory, dropped["path"]))
+                        except OSError:
+                            pass
+                    entries = entries[:self.max_profiles]
+                with open(os.path.join(self.directory, INDEX_FILE), "w") as file:
+                    for item in entries:
+                        file.write(json.dumps(item) + "\n")
+        except OSError as e:
+            print(f"Could not save profile {path}: {e}")
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE)) as file:
+                return [json.loads(line) for line in file if line.strip()]
+        except (OSError, ValueError):
+            return []
+
+
+def hot_frames(path, n=10):
+    """Returns (frame, share of samples) for the leaf frames seen most often in a collapsed-stack file."""
+    leaves = Counter()
+    with open(path) as file:
+        for line in file:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            leaves[stack.rsplit(";", 1)[-1]] += int(count)
+    total = sum(leaves.values()) or 1
+    return [(frame, count / total) for frame, count in leaves.most_common(n)]
+
+
+def main(argv):
+    directory = argv[0] if argv else "profiles"
+    profiler = Profiler(directory)
+    worst = profiler.worst()
+    if not worst:
+        print(f"No profiles in {directory}")
+        return 0
+    for entry in worst:
+        print(f"{entry['seconds']:8.3f}s  {entry['label']:<12} scan {entry['key']}  {entry['path']}")
+        try:
+            for frame, share in hot_frames(os.path.join(directory, entry["path"]), 3):
+                print(f"{share:14.0%}  {frame}")
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+
+def trie_pattern(keywords):
+    """Builds one regex matching any keyword, factored by common prefixes.
+
+    Optional suffixes are greedy, so at a given position the longest
+    keyword wins.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = None
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+
+class TrackerMatcher:
+    """Immutable, compiled view of one version of the tracker database."""
+
+    def __init__(self, entries, version):
+        self.version = version
+        self.entries = {entry["pattern"]: entry for entry in entries}
+        self.pattern = trie_pattern(self.entries) if self.entries else None
+        self._regex = re.compile(self.pattern) if self.pattern else None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, pattern):
+        return self.entries.get(pattern)
+
+    def match(self, text):
+        """Returns the entry of the leftmost (then longest) keyword in text, or None."""
+        if self._regex is None:
+            return None
+        found = self._regex.search(text)
+        return self.entries[found.group(0)] if found else None
+
+    def find_all(self, text):
+        if self._regex is None:
+            return []
+        return [self.entries[found.group(0)] for found in self._regex.finditer(text)]
+
+
+def parse_tracker_file(raw):
+    """Builds a TrackerMatcher from the bytes of a tracker JSON file."""
+    data = json.loads(raw)
+    entries = []
+    for item in data["trackers"]:
+        entries.append({
+            "pattern": item["pattern"],
+            "name": item.get("name", item["pattern"]),
+            "category": item["category"],
+            "company": item["company"],
+        })
+    source_hash = hashlib.sha1(raw).hexdigest()
+    version = source_hash[:12]
+    if data.get("version"):
+        version = f"{data['version']}-{version}"
+    matcher = TrackerMatcher(entries, version)
+    matcher.source_hash = source_hash
+    return matcher
+
+
+def check_tracker_file(raw):
+    """Returns the problems in a tracker JSON file that bloat the database without changing results.
+
+    Reports repeated keys within an object, repeated patterns, and patterns
+    containing a shorter pattern of the same category and company: any URL
+    they match already matches the shorter one.
+    """
+    problems = []
+
+    def object_pairs(pairs):
+        seen = set()
+        for key, _ in pairs:
+            if key in seen:
+                problems.append(f"duplicate key {key!r} in one object")
+            seen.add(key)
+        return dict(pairs)
+
+    data = json.loads(raw, object_pairs_hook=object_pairs)
+    owners = {}
+    for item in data["trackers"]:
+        pattern = item["pattern"]
+        if pattern in owners:
+            problems.append(f"duplicate pattern {pattern!r}")
+        owners[pattern] = (item["category"], item["company"])
+
+    for pattern, owner in owners.items():
+        # Every proper substring of pattern, checked against the set of patterns
+        for length in range(1, len(pattern)):
+            for start in range(len(pattern) - length + 1):
+                shorter = pattern[start:start + length]
+                if owners.get(shorter) == owner:
+                    problems.append(f"pattern {pattern!r} is subsumed by {shorter!r}")
+                    break
+            else:
+                continue
+            break
+    return problems
+
+
+class TrackerDatabase:
+    """Tracker list loaded from a JSON file and swapped in whenever the file changes.
+
+    Scans should call current() once and use that matcher throughout, so a
+    reload never changes the rules half way through a scan.
+    """
+
+    def __init__(self, path, poll_interval=2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._stamp = None
+        self._matcher = None
+        self._watcher = None
+        self._stop = threading.Event()
+        # Called with each newly loaded matcher, from the watcher thread
+        self.listeners = []
+        self.reload()
+
+    def current(self):
+        return self._matcher
+
+    @property
+    def version(self):
+        return self._matcher.version
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        with open(self.path, "rb") as file:
+            return parse_tracker_file(file.read())
+
+    def reload(self):
+        stamp = self._file_stamp()
+        matcher = self._load()
+        # Rebinding the attribute is atomic; scans holding the old matcher keep it
+        self._matcher = matcher
+        self._stamp = stamp
+        for listener in self.listeners:
+            listener(matcher)
+        return matcher
+
+    def start_watching(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="tracker-db-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            stamp = None
+            try:
+                stamp = self._file_stamp()
+                if stamp == self._stamp:
+                    continue
+                old_version = self._matcher.version
+                matcher = self.reload()
+                if matcher.version != old_version:
+                    print(f"Tracker database reloaded: {len(matcher)} trackers, version {matcher.version}")
+            except Exception as e:
+                # Keep serving the last good version until the file changes again
+                self._stamp = stamp
+                print(f"Tracker database reload failed: {e}")
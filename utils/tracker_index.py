@@ -0,0 +1,203 @@
+"""Flat binary form of a compiled tracker database, shared between processes via mmap.
+
+Layout (little endian, every section 4-byte aligned):
+    header      magic, format version, entry count and the (offset, length)
+                of the keyword regex, the database version and the source
+                file hash
+    entries     four (offset, length) string references per tracker:
+                pattern, name, category, company
+    strings     UTF-8 string data
+
+Each build is written to a new file next to the index path, and the index
+path itself holds the name of the current build. Workers map that file, so
+rebuilding never replaces a file that is mapped, which Windows refuses.
+
+Build with:
+    python -m utils.tracker_index build database/tracker_database.json database/tracker_database.idx
+"""
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+from utils.tracker_db import TrackerDatabase, parse_tracker_file
+
+MAGIC = b"PLTI"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHIIIIIII")
+FIELDS = ("pattern", "name", "category", "company")
+
+
+class TrackerIndexError(ValueError):
+    """Raised when an index file is malformed, of another format version, or stale."""
+
+
+def file_hash(path):
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def encode_index(matcher):
+    """Serializes a TrackerMatcher into the flat index format."""
+    entries = list(matcher.entries.values())
+
+    strings = bytearray()
+
+    def add(text):
+        data = text.encode("utf-8")
+        strings.extend(data)
+        return len(strings) - len(data), len(data)
+
+    pattern = add(matcher.pattern or "")
+    version = add(matcher.version)
+    source = add(getattr(matcher, "source_hash", ""))
+    records = [ref for entry in entries for field in FIELDS for ref in add(entry[field])]
+
+    base = HEADER.size + 4 * len(records)
+    # String offsets in the header and entry records are absolute
+    records = [value + base if i % 2 == 0 else value for i, value in enumerate(records)]
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(entries), pattern[0] + base, pattern[1],
+                         version[0] + base, version[1], source[0] + base, source[1])
+    return header + struct.pack(f"<{len(records)}I", *records) + bytes(strings)
+
+
+def build_index(matcher, path):
+    """Writes the index for matcher to a new build file and points path at it.
+
+    Builds no longer current are deleted; one a worker still maps on
+    Windows stays until a later build.
+    """
+    directory, base = os.path.split(path)
+    build_name = f"{base}.{time.time_ns():x}"
+    with open(os.path.join(directory, build_name), "wb") as file:
+        file.write(encode_index(matcher))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(build_name)
+    os.replace(temp_path, path)
+
+    for name in os.listdir(directory or "."):
+        if name.startswith(base + ".") and name != build_name and not name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def build_path(path):
+    """Returns the build file the index at path points to."""
+    with open(path, "rb") as file:
+        data = file.read(256)
+    name = data.decode("utf-8", "replace").strip()
+    if data.startswith(MAGIC) or not name or "\x00" in name or os.path.basename(name) != name:
+        raise TrackerIndexError(f"{path}: not a tracker index pointer, rebuild the index")
+    return os.path.join(os.path.dirname(path), name)
+
+
+class MappedTrackerMatcher:
+    """TrackerMatcher backed by a read-only mmap of an index build file.
+
+    Tracker entries stay in the mapped pages shared by every process
+    using the file and are decoded when first matched. Matching uses the
+    keyword regex TrackerMatcher compiles, read from the file, so loading
+    skips parsing the JSON and building the pattern.
+    """
+
+    def __init__(self, path, expected_source_hash=None):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise TrackerIndexError(f"{path}: file too short")
+        magic, format_version, _, entry_count, *refs = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise TrackerIndexError(f"{path}: not a tracker index")
+        if format_version != FORMAT_VERSION:
+            raise TrackerIndexError(f"{path}: format version {format_version}, expected {FORMAT_VERSION}")
+
+        self.pattern = self._string(refs[0], refs[1]) or None
+        self.version = self._string(refs[2], refs[3])
+        self.source_hash = self._string(refs[4], refs[5])
+        if expected_source_hash is not None and self.source_hash != expected_source_hash:
+            raise TrackerIndexError(f"{path}: built from a different tracker file, rebuild the index")
+
+        self._records = memoryview(self._map)[HEADER.size:HEADER.size + 8 * len(FIELDS) * entry_count].cast("I")
+        self._positions = {self._field(index, 0): index for index in range(entry_count)}
+        self._regex = re.compile(self.pattern) if self.pattern else None
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _string(self, offset, length):
+        return self._map[offset:offset + length].decode("utf-8")
+
+    def _field(self, index, field):
+        position = 2 * (index * len(FIELDS) + field)
+        return self._string(self._records[position], self._records[position + 1])
+
+    def _entry(self, index):
+        entry = self._decoded.get(index)
+        if entry is None:
+            entry = {name: self._field(index, field) for field, name in enumerate(FIELDS)}
+            self._decoded[index] = entry
+        return entry
+
+    def lookup(self, pattern):
+        index = self._positions.get(pattern)
+        return self._entry(index) if index is not None else None
+
+    def match(self, text):
+        if self._regex is None:
+            return None
+        found = self._regex.search(text)
+        return self._entry(self._positions[found.group(0)]) if found else None
+
+    def find_all(self, text):
+        if self._regex is None:
+            return []
+        return [self._entry(self._positions[found.group(0)]) for found in self._regex.finditer(text)]
+
+
+def load_index(path, source_path=None):
+    """Maps the current build of an index, checking it was built from source_path's current contents."""
+    expected = file_hash(source_path) if source_path else None
+    return MappedTrackerMatcher(build_path(path), expected)
+
+
+class MappedTrackerDatabase(TrackerDatabase):
+    """TrackerDatabase that maps a prebuilt index instead of compiling the JSON file.
+
+    The index is only accepted if it matches the current contents of
+    source_path; the watcher remaps it whenever it is rebuilt.
+    """
+
+    def __init__(self, path, source_path, poll_interval=2.0):
+        self.source_path = source_path
+        super().__init__(path, poll_interval)
+
+    def _load(self):
+        return load_index(self.path, self.source_path)
+
+
+def main(argv):
+    if len(argv) == 3 and argv[0] == "build":
+        with open(argv[1], "rb") as file:
+            matcher = parse_tracker_file(file.read())
+        build_index(matcher, argv[2])
+        print(f"Wrote {argv[2]}: {len(matcher)} trackers, version {matcher.version}")
+    elif len(argv) == 2 and argv[0] == "info":
+        index = load_index(argv[1])
+        print(f"{argv[1]}: {len(index)} trackers, version {index.version}, source {index.source_hash[:12]}")
+    else:
+        print("usage: python -m utils.tracker_index build <tracker.json> <index>\n"
+              "       python -m utils.tracker_index info <index>")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))